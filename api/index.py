@@ -1,122 +1,2724 @@
 # backend/server.py
 
 import os
+import re
+import json
+import asyncio
+import hashlib
+import tempfile
+import time
+import random
+import sqlite3
+import zlib
+import heapq
+import base64
+import bisect
+import pickle
+import struct
+import sys
+import fcntl
+import importlib
+from collections import OrderedDict, Counter
 import jwt
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Header, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from dotenv import load_dotenv
-from motor.motor_asyncio import AsyncIOMotorClient
-from PyPDF2 import PdfReader
-import docx
-import openai
-import bcrypt
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 
 # -------------------------
 # Load environment variables
 # -------------------------
-load_dotenv()
+# Heavy dependencies (motor, openai, httpx, PyPDF2, python-docx, bcrypt,
+# numpy) are imported on first use so serverless cold starts only pay for
+# what the request needs; see tests/test_import_time.py for the budget.
+class LazyModule:
+    """Stand-in for a module that imports it on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# matching, embeddings and the ANN index only; most requests never touch it
+np = LazyModule("numpy")
+
+def find_env_file():
+    api_dir = os.path.dirname(os.path.abspath(__file__))
+    for directory in (os.getcwd(), api_dir, os.path.dirname(api_dir)):
+        path = os.path.join(directory, ".env")
+        if os.path.isfile(path):
+            return path
+    return None
+
+_env_file = find_env_file()
+if _env_file:
+    from dotenv import load_dotenv
+    load_dotenv(_env_file)
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "resume_ai")
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "10000"))
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "memory")  # "memory" or "mongo"
+STORAGE_DATA_DIR = os.getenv("STORAGE_DATA_DIR", "")  # write log + snapshots for "memory"; empty = volatile
+TEXT_COMPRESSION = os.getenv("TEXT_COMPRESSION", "zlib")  # "zlib", "zstd" (needs zstandard) or "none"
+TEXT_COMPRESSION_DICT = os.getenv("TEXT_COMPRESSION_DICT", "")  # zstd dictionary trained on resumes (zstd --train)
+TEXT_COMPRESSION_MIN_BYTES = int(os.getenv("TEXT_COMPRESSION_MIN_BYTES", "256"))
+STORAGE_COMMIT_DELAY_MS = float(os.getenv("STORAGE_COMMIT_DELAY_MS", "2"))  # group-commit window
+STORAGE_SNAPSHOT_SECONDS = float(os.getenv("STORAGE_SNAPSHOT_SECONDS", "300"))
+STORAGE_SNAPSHOT_MIN_LOG_BYTES = int(os.getenv("STORAGE_SNAPSHOT_MIN_LOG_BYTES", str(1024 * 1024)))
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")  # point at a local fake server in tests
+OPENAI_TIMEOUT_SECONDS = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "4"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-in-production-192837465")
 UPLOAD_DIR = "uploads"
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_BATCH_MAX_FILES = int(os.getenv("UPLOAD_BATCH_MAX_FILES", "50"))
+JOBS_BULK_MAX_ITEMS = int(os.getenv("JOBS_BULK_MAX_ITEMS", "1000"))
+JOBS_BULK_MAX_BYTES = int(os.getenv("JOBS_BULK_MAX_BYTES", str(8 * 1024 * 1024)))
+PARSE_WORKERS = int(os.getenv("PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0 = thread offload
+PARSE_TIMEOUT_SECONDS = float(os.getenv("PARSE_TIMEOUT_SECONDS", "30"))
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_TTL = float(os.getenv("AUTH_TOKEN_CACHE_TTL", "300"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "30"))  # 0 disables
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "256"))
+RESUME_INGEST_MODE = os.getenv("RESUME_INGEST_MODE", "sync")  # "sync" or "async"
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100"))
+ANALYSIS_MODEL = os.getenv("ANALYSIS_MODEL", "gpt-4")
+ANALYSIS_CACHE_SIZE = int(os.getenv("ANALYSIS_CACHE_SIZE", "1024"))
+ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("ANALYSIS_CACHE_TTL_SECONDS", str(24 * 3600)))
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "")  # sqlite file; empty = memory only
+ANALYSIS_MAX_INPUT_TOKENS = int(os.getenv("ANALYSIS_MAX_INPUT_TOKENS", "6000"))
+ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", "2000"))
+ANALYSIS_MAX_CHUNKS = int(os.getenv("ANALYSIS_MAX_CHUNKS", "8"))  # summary calls per round; longer input is cut first
+MATCH_HASH_FEATURES = int(os.getenv("MATCH_HASH_FEATURES", str(2 ** 18)))
+MATCH_TOP_K = int(os.getenv("MATCH_TOP_K", "50"))
+MATCH_COMPACT_ROWS = int(os.getenv("MATCH_COMPACT_ROWS", "1024"))
+MATCH_TOPK_CACHE_SIZE = int(os.getenv("MATCH_TOPK_CACHE_SIZE", "10000"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "")  # local sentence-transformers model; empty = hashed fallback
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "128"))  # dimension of the hashed fallback
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_TRAIN_MIN = int(os.getenv("ANN_TRAIN_MIN", "2048"))
+JOBS_PAGE_SIZE = int(os.getenv("JOBS_PAGE_SIZE", "50"))
+JOBS_MAX_PAGE_SIZE = 200
+JOBS_MAX_NDJSON_PAGE_SIZE = int(os.getenv("JOBS_MAX_NDJSON_PAGE_SIZE", "10000"))  # page cap when streaming NDJSON
+JOB_INDEX_REFRESH_SECONDS = float(os.getenv("JOB_INDEX_REFRESH_SECONDS", "2"))  # poll a shared store for other workers' jobs; 0 = off
+JOB_INDEX_REFRESH_OVERLAP_SECONDS = float(os.getenv("JOB_INDEX_REFRESH_OVERLAP_SECONDS", "10"))  # in-flight inserts / clock skew
+NDJSON_CHUNK_ITEMS = 500
+JOB_SUMMARY_CHARS = 300
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# -------------------------
+# Metrics
+# -------------------------
+# Plain counters rendered in Prometheus text format on /metrics.  Recording
+# is a bisect plus a few list increments on the event loop, cheap enough to
+# leave on; labels are route templates and fixed span names only.
+METRICS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+def _label_text(labelnames, labels):
+    return ",".join(f'{name}="{str(value)}"' for name, value in zip(labelnames, labels))
+
+class Histogram:
+    """Latency histogram per label set: bucket counts, sum and count"""
+    def __init__(self, name, help_text, labelnames, buckets=METRICS_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self.series = {}
+
+    def observe(self, labels, seconds):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 3)
+        series[bisect.bisect_left(self.buckets, seconds)] += 1
+        series[-2] += seconds
+        series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self.series.items()):
+            prefix = _label_text(self.labelnames, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{prefix},le="+Inf"}} {series[-1]}')
+            lines.append(f"{self.name}_sum{{{prefix}}} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{{{prefix}}} {series[-1]}")
+        return lines
+
+def render_samples(name, help_text, kind, labelnames, samples):
+    """Counter/gauge lines from ``{labels tuple: value}``"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in sorted(samples.items()):
+        lines.append(f"{name}{{{_label_text(labelnames, labels)}}} {value}")
+    return lines
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Time until the response starts, per route", ("method", "route", "status")
+)
+requests_in_flight = {}
+span_latency = Histogram("app_span_duration_seconds", "Time spent in instrumented operations", ("span",))
+db_latency = Histogram("app_db_operation_duration_seconds", "Collection operation time", ("collection", "operation"))
+
+class span:
+    """``with span("parse_pdf"):`` records the block's duration"""
+    __slots__ = ("name", "started")
+
+    def __init__(self, name):
+        self.name = (name,)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        span_latency.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+class TimedRoute(APIRoute):
+    """Route class recording per-route latency and in-flight requests.
+
+    Wrapping the endpoint rather than the whole ASGI app means the route
+    template label is known up front, so in-flight counts are per route.
+    """
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def timed_handler(request):
+            key = (request.method, route)
+            requests_in_flight[key] = requests_in_flight.get(key, 0) + 1
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            except HTTPException as e:
+                status = e.status_code
+                raise
+            except RequestValidationError:
+                status = 422
+                raise
+            finally:
+                requests_in_flight[key] -= 1
+                request_latency.observe((request.method, route, status), time.perf_counter() - started)
+
+        return timed_handler
+
+# -------------------------
+# Initialize FastAPI
+# -------------------------
+app = FastAPI(title="Resume AI Backend")
+if METRICS_ENABLED:
+    app.router.route_class = TimedRoute
+
+# CORS Middleware
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
+)
+
+# -------------------------
+# In-Memory Storage (Development)
+# -------------------------
+class InsertResult:
+    def __init__(self, inserted_id):
+        self.inserted_id = inserted_id
+
+class InsertManyResult:
+    def __init__(self, inserted_ids):
+        self.inserted_ids = inserted_ids
+
+class UpdateResult:
+    def __init__(self, matched_count, modified_count):
+        self.matched_count = matched_count
+        self.modified_count = modified_count
+
+class DeleteResult:
+    def __init__(self, deleted_count):
+        self.deleted_count = deleted_count
+
+_text_codecs = {}
+
+def get_text_codec(name: str):
+    """(compress, decompress) for a codec name; zstd is optional and loaded lazily"""
+    if name not in _text_codecs:
+        if name == "zstd":
+            import zstandard
+            dict_data = None
+            if TEXT_COMPRESSION_DICT:
+                with open(TEXT_COMPRESSION_DICT, "rb") as f:
+                    dict_data = zstandard.ZstdCompressionDict(f.read())
+            compressor = zstandard.ZstdCompressor(level=3, dict_data=dict_data)
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            _text_codecs[name] = (compressor.compress, decompressor.decompress)
+        else:
+            _text_codecs[name] = (lambda data: zlib.compress(data, 6), zlib.decompress)
+    return _text_codecs[name]
+
+def default_text_codec():
+    global TEXT_COMPRESSION
+    if TEXT_COMPRESSION == "zstd":
+        try:
+            get_text_codec("zstd")
+        except Exception as e:
+            print(f"zstd unavailable, compressing text with zlib: {str(e)}")
+            TEXT_COMPRESSION = "zlib"
+    return TEXT_COMPRESSION
+
+class CompressedText:
+    """A large string field held compressed; ``text()`` inflates it on demand"""
+    __slots__ = ("codec", "size", "data")
+
+    def __init__(self, codec, size, data):
+        self.codec = codec
+        self.size = size
+        self.data = data
+
+    @classmethod
+    def pack(cls, text: str):
+        """Compressed form of ``text``, or ``text`` itself when too short to be worth it"""
+        codec = default_text_codec()
+        raw = text.encode()
+        if codec == "none" or len(raw) < TEXT_COMPRESSION_MIN_BYTES:
+            return text
+        data = get_text_codec(codec)[0](raw)
+        return cls(codec, len(raw), data) if len(data) < len(raw) else text
+
+    def text(self) -> str:
+        return get_text_codec(self.codec)[1](self.data).decode()
+
+    def __reduce__(self):
+        return (CompressedText, (self.codec, self.size, self.data))
+
+class Record:
+    """Compact stored document: an interned field layout shared by every
+    document with the same keys, plus a tuple of values.  Compressed fields
+    are inflated only when read, so projections that skip them never pay."""
+    __slots__ = ("_fields", "_values")
+    _layouts = {}
+
+    def __init__(self, fields, values):
+        layout = Record._layouts.get(fields)
+        if layout is None:
+            layout = Record._layouts[fields] = {field: i for i, field in enumerate(fields)}
+        self._fields = layout
+        self._values = values
+
+    @classmethod
+    def from_dict(cls, doc, compressed=()):
+        values = []
+        for field, value in doc.items():
+            if field in compressed and isinstance(value, str):
+                value = CompressedText.pack(value)
+            values.append(value)
+        return cls(tuple(doc), tuple(values))
+
+    def __reduce__(self):
+        return (Record, (tuple(self._fields), self._values))
+
+    def __contains__(self, field):
+        return field in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __getitem__(self, field):
+        value = self._values[self._fields[field]]
+        return value.text() if isinstance(value, CompressedText) else value
+
+    def get(self, field, default=None):
+        return self[field] if field in self._fields else default
+
+    def to_dict(self, raw=False):
+        """Plain dict copy; ``raw`` keeps compressed fields compressed"""
+        if raw:
+            return dict(zip(self._fields, self._values))
+        return {field: self[field] for field in self._fields}
+
+def apply_projection(doc, projection):
+    """Mongo-style inclusion ({"a": 1}) or exclusion ({"a": 0}) projection"""
+    if not projection:
+        return doc.to_dict() if isinstance(doc, Record) else doc
+    if isinstance(projection, (list, tuple)):
+        projection = {field: 1 for field in projection}
+    include = [field for field, keep in projection.items() if keep and field != "_id"]
+    if include:
+        result = {field: doc[field] for field in include if field in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            result["_id"] = doc["_id"]
+        return result
+    return {field: doc[field] for field in doc if projection.get(field, 1)}
+
+class InMemoryCursor:
+    """Motor-compatible cursor: chain ``sort``/``skip``/``limit``, then
+    ``async for`` or ``to_list``.  Without a sort, documents are matched,
+    projected and yielded one at a time; with a limit, sorting keeps only
+    the top ``skip + limit`` documents in a heap."""
+    def __init__(self, collection, query, projection=None):
+        self.collection = collection
+        self.query = query
+        self.projection = projection
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+        self._iterator = None
+
+    def sort(self, key_or_list, direction=1):
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count):
+        self._skip = count
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _sorted(self, docs):
+        # stable multi-key sort: apply keys from last to first
+        docs = list(docs)
+        for field, direction in reversed(self._sort):
+            docs.sort(key=lambda d: (d.get(field) is not None, d.get(field)), reverse=direction < 0)
+        return docs
+
+    def _documents(self):
+        matches = (doc for doc in self.collection._candidates(self.query) if self.collection._matches(doc, self.query))
+        if self._sort:
+            if self._limit and len(self._sort) == 1:
+                field, direction = self._sort[0]
+                key = lambda d: (d.get(field) is not None, d.get(field))
+                pick = heapq.nlargest if direction < 0 else heapq.nsmallest
+                matches = pick(self._skip + self._limit, matches, key=key)
+            else:
+                matches = self._sorted(matches)
+        returned = 0
+        for position, doc in enumerate(matches):
+            if position < self._skip:
+                continue
+            if self._limit and returned >= self._limit:
+                break
+            returned += 1
+            yield apply_projection(doc, self.projection)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._iterator is None:
+            self._iterator = self._documents()
+        try:
+            return next(self._iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def to_list(self, length=None):
+        results = []
+        async for doc in self:
+            results.append(doc)
+            if length and len(results) >= length:
+                break
+        return results
+
+def _index_key(value):
+    """Hashable key for an indexed field value (ObjectId, str, int... or a repr fallback)"""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+class InMemoryCollection:
+    """Simple in-memory storage for development.
+
+    Documents live in ``self.data`` as compact ``Record``s keyed by their
+    string ``_id`` so ``_id`` lookups are a single dict hit; reads return
+    plain dict copies.  Secondary hash indexes declared with
+    ``create_index`` map field value -> set of ids and are kept in sync on
+    every insert/update/delete.  ``compressed`` names string fields stored
+    compressed (e.g. resume text).
+    """
+    def __init__(self, indexes=None, name=None, journal=None, compressed=()):
+        self.name = name
+        self.journal = journal
+        self.compressed = frozenset(compressed)
+        self.data = {}
+        self._indexes = {}
+        self._unique = set()
+        for index in indexes or []:
+            if isinstance(index, str):
+                self.create_index(index)
+            else:
+                field, unique = index
+                self.create_index(field, unique=unique)
+
+    def create_index(self, field, unique=False):
+        """Declare a hash index on ``field`` and build it from existing documents"""
+        index = {}
+        for doc_id, doc in self.data.items():
+            if field not in doc:
+                continue
+            ids = index.setdefault(_index_key(doc[field]), set())
+            if unique and ids:
+                raise DuplicateKeyError(f"Duplicate key for unique index on '{field}'")
+            ids.add(doc_id)
+        self._indexes[field] = index
+        if unique:
+            self._unique.add(field)
+        return field
+
+    def _index_add(self, doc_id, doc):
+        for field, index in self._indexes.items():
+            if field in doc:
+                index.setdefault(_index_key(doc[field]), set()).add(doc_id)
+
+    def _index_remove(self, doc_id, doc):
+        for field, index in self._indexes.items():
+            if field not in doc:
+                continue
+            key = _index_key(doc[field])
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(doc_id)
+                if not ids:
+                    del index[key]
+
+    def _check_unique(self, doc, doc_id=None):
+        for field in self._unique:
+            if field not in doc:
+                continue
+            ids = self._indexes[field].get(_index_key(doc[field]), ())
+            if any(existing != doc_id for existing in ids):
+                raise DuplicateKeyError(f"Duplicate key for unique index on '{field}'")
+
+    def _candidates(self, query):
+        """Narrow the documents to check using ``_id`` or the most selective index"""
+        if "_id" in query:
+            doc = self.data.get(str(query["_id"]))
+            return [doc] if doc is not None else []
+
+        best = None
+        for field, value in query.items():
+            if field in self._indexes:
+                ids = self._indexes[field].get(_index_key(value), ())
+                if best is None or len(ids) < len(best):
+                    best = ids
+                if not best:
+                    return []
+        if best is None:
+            return list(self.data.values())
+        return [self.data[doc_id] for doc_id in best]
+
+    def _matches(self, doc, query):
+        return all(doc.get(k) == v for k, v in query.items())
+
+    async def _log(self, op, key, doc=None):
+        """Make a mutation durable before acknowledging it (no-op when volatile)"""
+        if self.journal is not None:
+            await self.journal.append((op, self.name, key, doc))
+
+    def _replay(self, op, key, doc):
+        """Apply a logged mutation; records hold whole documents so replay is idempotent"""
+        if isinstance(doc, dict):
+            doc = Record.from_dict(doc, self.compressed)
+        old = self.data.pop(key, None)
+        if old is not None:
+            self._index_remove(key, old)
+        if op != "delete":
+            self.data[key] = doc
+            self._index_add(key, doc)
+
+    def _first(self, query):
+        for doc in self._candidates(query):
+            if self._matches(doc, query):
+                return doc
+        return None
+
+    async def find_one(self, query, projection=None):
+        doc = self._first(query)
+        return None if doc is None else apply_projection(doc, projection)
+
+    async def insert_one(self, doc):
+        doc_id = doc.get("_id") or ObjectId()
+        doc["_id"] = doc_id
+        key = str(doc_id)
+        if key in self.data:
+            raise DuplicateKeyError("Duplicate key for unique index on '_id'")
+        self._check_unique(doc)
+        record = Record.from_dict(doc, self.compressed)
+        self.data[key] = record
+        self._index_add(key, record)
+        await self._log("put", key, record)
+        return InsertResult(doc_id)
+
+    async def insert_many(self, docs, ordered=True):
+        """Insert several documents with one durable log commit.
+
+        Like Motor, a duplicate raises ``BulkWriteError`` whose
+        ``details["writeErrors"]`` carry the failing positions; ``ordered``
+        stops at the first failure, otherwise the rest are still inserted.
+        """
+        inserted_ids, errors, records = [], [], []
+        for position, doc in enumerate(docs):
+            doc_id = doc.get("_id") or ObjectId()
+            doc["_id"] = doc_id
+            key = str(doc_id)
+            try:
+                if key in self.data:
+                    raise DuplicateKeyError("Duplicate key for unique index on '_id'")
+                self._check_unique(doc)
+            except DuplicateKeyError as e:
+                errors.append({"index": position, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+                continue
+            record = Record.from_dict(doc, self.compressed)
+            self.data[key] = record
+            self._index_add(key, record)
+            records.append(("put", self.name, key, record))
+            inserted_ids.append(doc_id)
+        if self.journal is not None and records:
+            await self.journal.append_many(records)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted_ids)})
+        return InsertManyResult(inserted_ids)
+
+    async def update_one(self, query, update):
+        """Apply a ``{"$set": {...}}`` (or ``$unset``) update to the first match"""
+        doc = self._first(query)
+        if doc is None:
+            return UpdateResult(0, 0)
+
+        key = str(doc["_id"])
+        updated = doc.to_dict(raw=True)
+        updated.update(update.get("$set", {}))
+        for field in update.get("$unset", {}):
+            updated.pop(field, None)
+        self._check_unique(updated, doc_id=key)
+
+        record = Record.from_dict(updated, self.compressed)
+        self._index_remove(key, doc)
+        self.data[key] = record
+        self._index_add(key, record)
+        await self._log("put", key, record)
+        return UpdateResult(1, 1)
+
+    async def delete_one(self, query):
+        doc = self._first(query)
+        if doc is None:
+            return DeleteResult(0)
+        key = str(doc["_id"])
+        self._index_remove(key, doc)
+        del self.data[key]
+        await self._log("delete", key)
+        return DeleteResult(1)
+
+    def find(self, query=None, projection=None):
+        return InMemoryCursor(self, query or {}, projection)
+
+    def memory_stats(self):
+        """Approximate resident bytes of the documents, compressed fields and indexes"""
+        layouts, document_bytes = set(), 0
+        text = {"fields": 0, "raw_bytes": 0, "stored_bytes": 0}
+        for record in self.data.values():
+            document_bytes += sys.getsizeof(record) + sys.getsizeof(record._values)
+            layouts.add(id(record._fields))
+            for value in record._values:
+                document_bytes += sys.getsizeof(value)
+                if isinstance(value, CompressedText):
+                    document_bytes += sys.getsizeof(value.data)
+                    text["fields"] += 1
+                    text["raw_bytes"] += value.size
+                    text["stored_bytes"] += len(value.data)
+        index_bytes = sum(
+            sys.getsizeof(index) + sum(sys.getsizeof(ids) for ids in index.values())
+            for index in self._indexes.values()
+        )
+        if text["raw_bytes"]:
+            text["ratio"] = round(text["stored_bytes"] / text["raw_bytes"], 3)
+        return {
+            "documents": len(self.data),
+            "layouts": len(layouts),
+            "document_bytes": document_bytes,
+            "index_bytes": index_bytes + sys.getsizeof(self.data),
+            "compressed_text": text,
+        }
+
+# -------------------------
+# Storage Backends
+# -------------------------
+# Index declarations shared by every backend: (field, unique)
+COLLECTION_INDEXES = {
+    "users": [("email", True)],
+    "resumes": [("user_id", False), ("content_hash", False)],
+    "jobs": [("employer_id", False)],
+    "applications": [("user_id", False), ("job_id", False)],
+    "analyses": [("cache_key", True)],
+}
+# Large string fields the in-memory engine keeps compressed
+COLLECTION_COMPRESSED_FIELDS = {
+    "resumes": ["content"],
+}
+
+class InMemoryStorage:
+    """Process-local collections (development / single worker)"""
+    name = "in-memory"
+    shared = False  # no other process writes to it
+
+    def __init__(self):
+        self.collections = {}
+
+    async def connect(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def collection(self, name):
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(
+                indexes=COLLECTION_INDEXES.get(name, []), name=name,
+                compressed=COLLECTION_COMPRESSED_FIELDS.get(name, ()),
+            )
+        return self.collections[name]
+
+    async def stats(self):
+        return {name: c.memory_stats() for name, c in self.collections.items()}
+
+class WriteAheadLog:
+    """Append-only mutation log with group commit.
+
+    Each record is ``<len><crc32><pickle>``.  Writers append and await a
+    shared commit: records arriving within STORAGE_COMMIT_DELAY_MS are
+    written and fsynced together off the event loop, so a burst of N
+    inserts costs one fsync instead of N.  A torn tail left by a crash
+    fails its checksum and is truncated on load.
+    """
+    HEADER = struct.Struct("<II")
+
+    def __init__(self, path, commit_delay=0.002):
+        self.path = path
+        self.commit_delay = commit_delay
+        self.file = None
+        self.pending = []
+        self.commit = None
+        self._lock = None
+        self.stats = {"records": 0, "commits": 0, "bytes": 0}
+
+    @property
+    def lock(self):
+        """Serialises log writes with snapshots; created on first use so it
+        binds to the running loop (the log itself is opened at import time)"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def open(self):
+        """Open the log for appending, holding an exclusive lock on it for
+        as long as it stays open: two workers appending to one log would
+        interleave their records, so a second one sharing the data
+        directory fails at startup instead"""
+        self.file = open(self.path, "ab")
+        try:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self.file.close()
+            self.file = None
+            raise RuntimeError(
+                f"{self.path} is locked by another process; "
+                "STORAGE_DATA_DIR cannot be shared between workers"
+            ) from None
+        self.stats["bytes"] = self.file.tell()
+
+    def close(self):
+        """Close the log and release its lock"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def read(self):
+        """Records in the log, stopping at (and truncating) a torn or corrupt tail"""
+        if not os.path.exists(self.path):
+            return []
+        records, offset = [], 0
+        with open(self.path, "rb") as f:
+            data = f.read()
+        while offset + self.HEADER.size <= len(data):
+            size, crc = self.HEADER.unpack_from(data, offset)
+            body = data[offset + self.HEADER.size:offset + self.HEADER.size + size]
+            if len(body) < size or zlib.crc32(body) != crc:
+                break
+            records.append(pickle.loads(body))
+            offset += self.HEADER.size + size
+        if offset < len(data):
+            print(f"⚠️ Truncating {len(data) - offset} bytes of torn write log tail")
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        self.stats["bytes"] = offset
+        return records
+
+    async def append(self, record):
+        await self.append_many([record])
+
+    async def append_many(self, records):
+        for record in records:
+            body = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+            self.pending.append(self.HEADER.pack(len(body), zlib.crc32(body)) + body)
+        if self.commit is None:
+            self.commit = asyncio.ensure_future(self._group_commit())
+        await asyncio.shield(self.commit)
+
+    async def _group_commit(self):
+        await asyncio.sleep(self.commit_delay)
+        async with self.lock:
+            # later appends start the next group while this one is on disk
+            batch, self.pending, self.commit = self.pending, [], None
+            await run_in_threadpool(self._write, b"".join(batch))
+            self.stats["records"] += len(batch)
+            self.stats["commits"] += 1
+
+    def _write(self, data):
+        self.file.write(data)
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.stats["bytes"] = self.file.tell()
+
+    def reset(self):
+        """Empty the log once a snapshot covers everything in it (lock held)"""
+        self.file.truncate(0)
+        self.file.seek(0)
+        os.fsync(self.file.fileno())
+        self.stats["bytes"] = 0
+
+class DurableStorage(InMemoryStorage):
+    """In-memory collections made crash-safe by a write log plus snapshots.
+
+    Reads stay at memory speed.  On construction the latest snapshot is
+    loaded, the log is replayed on top and indexes are rebuilt; once
+    connected, a background task periodically writes a compacted snapshot
+    and empties the log.
+    """
+    name = "in-memory (durable)"
+
+    def __init__(self, data_dir, commit_delay_ms=2, snapshot_seconds=300, snapshot_min_log_bytes=1024 * 1024):
+        super().__init__()
+        self.data_dir = data_dir
+        self.snapshot_path = os.path.join(data_dir, "snapshot.pkl")
+        self.journal = WriteAheadLog(os.path.join(data_dir, "journal.log"), commit_delay_ms / 1000)
+        self.snapshot_seconds = snapshot_seconds
+        self.snapshot_min_log_bytes = snapshot_min_log_bytes
+        self.snapshot_task = None
+        # restored synchronously so collections are usable at import time,
+        # like the volatile backend (serverless hosts may skip lifespan events)
+        self.restore()
+
+    def collection(self, name):
+        if name not in self.collections:
+            self.collections[name] = InMemoryCollection(
+                indexes=COLLECTION_INDEXES.get(name, []), name=name, journal=self.journal,
+                compressed=COLLECTION_COMPRESSED_FIELDS.get(name, ()),
+            )
+        return self.collections[name]
+
+    def restore(self):
+        """Load the latest snapshot, replay the log on top and rebuild indexes"""
+        os.makedirs(self.data_dir, exist_ok=True)
+        # locked before anything is read, so a second worker on the same
+        # directory never loads a log the first one is still appending to
+        self.journal.open()
+        snapshot = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                snapshot = pickle.load(f)
+        for name, docs in snapshot.items():
+            collection = self.collection(name)
+            collection.data = {
+                key: Record.from_dict(doc, collection.compressed) if isinstance(doc, dict) else doc
+                for key, doc in docs.items()
+            }
+            for field in list(collection._indexes):
+                collection.create_index(field, unique=field in collection._unique)
+        records = self.journal.read()
+        for op, name, key, doc in records:
+            self.collection(name)._replay(op, key, doc)
+        print(f"✓ Loaded {sum(len(c.data) for c in self.collections.values())} documents "
+              f"({len(records)} replayed log records) from {self.data_dir}")
+
+    async def connect(self):
+        if self.snapshot_task is None and self.snapshot_seconds > 0:
+            self.snapshot_task = asyncio.create_task(self._snapshot_loop())
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_seconds)
+            if self.journal.stats["bytes"] >= self.snapshot_min_log_bytes:
+                try:
+                    await self.snapshot()
+                except Exception as e:
+                    print(f"Snapshot error: {str(e)}")
+
+    async def snapshot(self):
+        """Write a compacted snapshot of every collection, then empty the log"""
+        async with self.journal.lock:
+            # captured without yielding, so it reflects every logged record;
+            # records still pending are replayed idempotently after it.
+            # Records are immutable, so shallow copies are a consistent view
+            # that writers on the loop can't change while the thread pickles
+            data = {name: dict(c.data) for name, c in self.collections.items()}
+            await run_in_threadpool(self._write_snapshot, data)
+            self.journal.reset()
+
+    def _write_snapshot(self, data):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    async def close(self):
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+            self.snapshot_task = None
+        if self.journal.commit is not None:
+            await asyncio.shield(self.journal.commit)
+        # the log stays open: writes from later shutdown hooks still land
+        # in it and are replayed over this snapshot on the next start
+        await self.snapshot()
+
+class MongoStorage:
+    """MongoDB via one shared Motor client, so every worker sees the same data"""
+    name = "MongoDB"
+    shared = True
+
+    def __init__(self, uri, db_name, max_pool_size=100, min_pool_size=0,
+                 server_selection_timeout_ms=5000, connect_timeout_ms=10000,
+                 client_factory=None):
+        self.uri = uri
+        self.db_name = db_name
+        self.client_options = {
+            "maxPoolSize": max_pool_size,
+            "minPoolSize": min_pool_size,
+            "serverSelectionTimeoutMS": server_selection_timeout_ms,
+            "connectTimeoutMS": connect_timeout_ms,
+        }
+        self.client_factory = client_factory
+        self.client = None
+        self.db = None
+
+    async def connect(self):
+        if self.client is not None:
+            return
+        client_factory = self.client_factory
+        if client_factory is None:
+            from motor.motor_asyncio import AsyncIOMotorClient
+            client_factory = AsyncIOMotorClient
+        self.client = client_factory(self.uri, **self.client_options)
+        self.db = self.client[self.db_name]
+        await self.ensure_indexes()
+
+    async def ensure_indexes(self):
+        for name, indexes in COLLECTION_INDEXES.items():
+            for field, unique in indexes:
+                await self.db[name].create_index(field, unique=unique)
+        # the server drops analyses once they expire, including ones never read again
+        await self.db["analyses"].create_index("expires_at", expireAfterSeconds=0)
+
+    async def close(self):
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+            self.db = None
+
+    def collection(self, name):
+        if self.db is None:
+            raise RuntimeError("MongoStorage.connect() must be awaited before use")
+        return self.db[name]
+
+    async def stats(self):
+        """Server-side sizes (WiredTiger already compresses documents on disk)"""
+        stats = {}
+        for name in COLLECTION_INDEXES:
+            try:
+                info = await self.db.command("collStats", name)
+            except Exception as e:
+                stats[name] = {"error": str(e)}
+                continue
+            stats[name] = {
+                "documents": info.get("count", 0),
+                "document_bytes": info.get("size", 0),
+                "storage_bytes": info.get("storageSize", 0),
+                "index_bytes": info.get("totalIndexSize", 0),
+            }
+        return stats
+
+def create_storage(backend: str):
+    if backend == "memory":
+        if STORAGE_DATA_DIR:
+            return DurableStorage(
+                STORAGE_DATA_DIR,
+                commit_delay_ms=STORAGE_COMMIT_DELAY_MS,
+                snapshot_seconds=STORAGE_SNAPSHOT_SECONDS,
+                snapshot_min_log_bytes=STORAGE_SNAPSHOT_MIN_LOG_BYTES,
+            )
+        return InMemoryStorage()
+    if backend == "mongo":
+        return MongoStorage(
+            MONGO_URI,
+            MONGO_DB_NAME,
+            max_pool_size=MONGO_MAX_POOL_SIZE,
+            min_pool_size=MONGO_MIN_POOL_SIZE,
+            server_selection_timeout_ms=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connect_timeout_ms=MONGO_CONNECT_TIMEOUT_MS,
+        )
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+storage = create_storage(STORAGE_BACKEND)
+users_collection = resumes_collection = jobs_collection = applications_collection = None
+analyses_collection = None
+
+class TimedCursor:
+    """Cursor wrapper timing ``to_list`` against the collection"""
+    def __init__(self, cursor, labels):
+        self.cursor = cursor
+        self.labels = labels
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self.cursor = self.cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    def __aiter__(self):
+        return self.cursor.__aiter__()
+
+    async def to_list(self, length=None):
+        started = time.perf_counter()
+        try:
+            return await self.cursor.to_list(length)
+        finally:
+            db_latency.observe(self.labels, time.perf_counter() - started)
+
+class TimedCollection:
+    """Collection wrapper recording per-operation latency for any backend"""
+    def __init__(self, collection, name):
+        self.collection = collection
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(self.collection, attr)
+
+    async def _timed(self, operation, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await getattr(self.collection, operation)(*args, **kwargs)
+        finally:
+            db_latency.observe((self.name, operation), time.perf_counter() - started)
+
+    async def find_one(self, *args, **kwargs):
+        return await self._timed("find_one", *args, **kwargs)
+
+    async def insert_one(self, *args, **kwargs):
+        return await self._timed("insert_one", *args, **kwargs)
+
+    async def insert_many(self, *args, **kwargs):
+        return await self._timed("insert_many", *args, **kwargs)
+
+    async def update_one(self, *args, **kwargs):
+        return await self._timed("update_one", *args, **kwargs)
+
+    async def delete_one(self, *args, **kwargs):
+        return await self._timed("delete_one", *args, **kwargs)
+
+    def find(self, *args, **kwargs):
+        return TimedCursor(self.collection.find(*args, **kwargs), (self.name, "find"))
+
+def bound_collection(name):
+    collection = storage.collection(name)
+    return TimedCollection(collection, name) if METRICS_ENABLED else collection
+
+def bind_collections():
+    """Point the module-level collection handles at the active storage backend"""
+    global users_collection, resumes_collection, jobs_collection, applications_collection
+    global analyses_collection
+    users_collection = bound_collection("users")
+    resumes_collection = bound_collection("resumes")
+    jobs_collection = bound_collection("jobs")
+    applications_collection = bound_collection("applications")
+    analyses_collection = bound_collection("analyses")
+
+async def insert_many_reporting(collection, docs):
+    """Unordered ``insert_many``; returns ``{position: error}`` for documents that failed"""
+    if not docs:
+        return {}
+    try:
+        await collection.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        return {error["index"]: error.get("errmsg", "Write failed") for error in e.details.get("writeErrors", [])}
+    return {}
+
+# In-memory collections are usable immediately; Mongo binds on startup
+if isinstance(storage, InMemoryStorage):
+    bind_collections()
+
+@app.on_event("startup")
+async def startup_storage():
+    await storage.connect()
+    bind_collections()
+    print(f"✓ Using {storage.name} storage")
+
+@app.on_event("shutdown")
+async def shutdown_storage():
+    await storage.close()
+
+# -------------------------
+# Pydantic Models
+# -------------------------
+class UserCreate(BaseModel):
+    email: str
+    password: str
+    name: Optional[str] = None
+    role: Optional[str] = "job_seeker"
+
+class UserLogin(BaseModel):
+    email: str
+    password: str
+
+# -------------------------
+# Helpers: Parse PDF/DOCX
+# -------------------------
+def parse_pdf(file_path: str) -> str:
+    from PyPDF2 import PdfReader
+    text = ""
+    with open(file_path, "rb") as f:
+        reader = PdfReader(f)
+        for page in reader.pages:
+            page_text = page.extract_text()
+            if page_text:
+                text += page_text + "\n"
+    return text
+
+def parse_docx(file_path: str) -> str:
+    import docx
+    doc = docx.Document(file_path)
+    return "\n".join([para.text for para in doc.paragraphs])
+
+def parse_resume_file(file_path: str) -> str:
+    """Dispatch on extension; runs inside a parse worker process"""
+    if file_path.lower().endswith(".pdf"):
+        return parse_pdf(file_path)
+    return parse_docx(file_path)
+
+def is_supported_resume(filename: str) -> bool:
+    return filename.lower().endswith((".pdf", ".docx"))
+
+_parse_executor = None
+
+def get_parse_executor():
+    """Lazily start the bounded parse pool; None means fall back to a thread offload
+    (e.g. serverless runtimes without /dev/shm for multiprocessing)"""
+    global _parse_executor
+    if _parse_executor is None and PARSE_WORKERS > 0:
+        try:
+            _parse_executor = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        except (OSError, NotImplementedError) as e:
+            print(f"Process pool unavailable, parsing in threads: {str(e)}")
+            return None
+    return _parse_executor
+
+def recycle_parse_executor(executor):
+    """Terminate a pool whose worker is stuck on a file; the next parse starts a fresh one"""
+    global _parse_executor
+    if _parse_executor is executor:
+        _parse_executor = None
+    # cancelling the future does not stop the worker, and shutdown() would wait for it
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+async def parse_resume(file_path: str) -> str:
+    """Parse a saved resume off the event loop, bounded by PARSE_TIMEOUT_SECONDS.
+
+    A timed-out parse recycles the process pool so the runaway worker
+    stops consuming a slot.  A pool broken by a crashed worker (OOM kill,
+    segfault in a parser) is recycled too.  Parses caught on a recycled
+    pool are retried once on a fresh one; a file that breaks the pool
+    twice is rejected.  (The thread fallback cannot be stopped.)
+    """
+    for attempt in range(2):
+        executor = get_parse_executor()
+        try:
+            if executor is None:
+                job = run_in_threadpool(parse_resume_file, file_path)
+            else:
+                job = asyncio.get_running_loop().run_in_executor(executor, parse_resume_file, file_path)
+            with span("parse_pdf" if file_path.lower().endswith(".pdf") else "parse_docx"):
+                return await asyncio.wait_for(job, timeout=PARSE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            if executor is not None:
+                recycle_parse_executor(executor)
+            raise HTTPException(status_code=422, detail="Resume parsing timed out")
+        except BrokenProcessPool:
+            # a worker died, either under this parse or killed by a recycle
+            recycle_parse_executor(executor)
+            if attempt:
+                raise HTTPException(status_code=422, detail="Resume could not be parsed")
+
+@app.on_event("shutdown")
+async def shutdown_parse_pool():
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+
+async def save_upload(file: UploadFile):
+    """Stream an upload to disk in chunks under its SHA-256 name.
+
+    Returns ``(file_path, content_hash, size)``.  Uploads over
+    MAX_UPLOAD_BYTES are rejected with 413 as soon as the cap is crossed.
+    """
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    extension = os.path.splitext(file.filename)[1].lower()
+    fd, tmp_path = tempfile.mkstemp(dir=UPLOAD_DIR, suffix=".part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail="File too large")
+                digest.update(chunk)
+                await run_in_threadpool(f.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+
+        content_hash = digest.hexdigest()
+        file_path = os.path.join(UPLOAD_DIR, content_hash + extension)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return file_path, content_hash, size
+
+# -------------------------
+# Content-Hash Deduplication
+# -------------------------
+dedup_stats = {"parse_hits": 0, "parse_misses": 0, "analysis_hits": 0, "analysis_misses": 0}
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+async def find_parsed_content(content_hash: str):
+    """Extracted text of an already-parsed upload with the same bytes, if any"""
+    existing = await resumes_collection.find_one({"content_hash": content_hash, "status": "ready"})
+    if existing is None:
+        dedup_stats["parse_misses"] += 1
+        return None
+    dedup_stats["parse_hits"] += 1
+    return existing["content"]
+
+async def find_cached_analysis(cache_key: str):
+    """Stored analysis for ``cache_key`` unless it has outlived ANALYSIS_CACHE_TTL_SECONDS"""
+    cached = await analyses_collection.find_one({"cache_key": cache_key})
+    if cached is not None and (cached.get("expires_at") or datetime.min) <= datetime.utcnow():
+        # expired (or stored before analyses expired): drop it so a fresh
+        # analysis can take its key
+        await analyses_collection.delete_one({"_id": cached["_id"]})
+        cached = None
+    if cached is None:
+        dedup_stats["analysis_misses"] += 1
+        return None
+    dedup_stats["analysis_hits"] += 1
+    return {"analysis": cached["analysis"], "token_budget": cached.get("token_budget")}
+
+async def store_analysis(cache_key: str, content_hash: str, result: dict, model: str):
+    now = datetime.utcnow()
+    try:
+        await analyses_collection.insert_one({
+            "cache_key": cache_key,
+            "content_hash": content_hash,
+            "analysis": result["analysis"],
+            "token_budget": result["token_budget"],
+            "model": model,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=ANALYSIS_CACHE_TTL_SECONDS),
+        })
+    except DuplicateKeyError:
+        pass  # a concurrent request stored the same analysis first
+
+# -------------------------
+# Analysis Cache (LRU + TTL, single-flight)
+# -------------------------
+ANALYSIS_SYSTEM_PROMPT = "You are an expert resume analyzer."
+ANALYSIS_USER_PROMPT = "Analyze this resume and provide a summary:\n{content}"
+ANALYSIS_SUMMARY_PROMPT = (
+    "Condense this part of a resume. Keep every skill, job title, employer, "
+    "date, degree and measurable achievement; drop boilerplate:\n{content}"
+)
+
+def analysis_cache_key(content_hash: str, model: str = None) -> str:
+    """Key an analysis by resume content, model and both prompts"""
+    parts = [
+        content_hash, model or ANALYSIS_MODEL, ANALYSIS_SYSTEM_PROMPT, ANALYSIS_USER_PROMPT,
+        ANALYSIS_SUMMARY_PROMPT, str(ANALYSIS_MAX_INPUT_TOKENS), str(ANALYSIS_CHUNK_TOKENS),
+        str(ANALYSIS_MAX_CHUNKS),
+    ]
+    return text_hash("\0".join(parts))
+
+class AnalysisCache:
+    """Size-bounded LRU with per-entry TTL.
+
+    Concurrent ``get_or_compute`` calls for the same key share one
+    in-flight task.  With ``path`` set, entries are also written through
+    to a local sqlite file so they survive restarts.
+    """
+    def __init__(self, max_entries=1024, ttl_seconds=24 * 3600, path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0}
+        self._inflight = {}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM analysis_cache WHERE expires_at < ?", (time.time(),))
+            self._db.commit()
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT value, expires_at FROM analysis_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        return value
+
+    def _remember(self, key, value, expires_at):
+        self.entries[key] = (value, expires_at)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] < time.time():
+            del self.entries[key]
+            entry = None
+        if entry is not None:
+            self.entries.move_to_end(key)
+            value = entry[0]
+        else:
+            value = self._load(key)
+        self.stats["hits" if value is not None else "misses"] += 1
+        return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl_seconds
+        self._remember(key, value, expires_at)
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._db.commit()
+
+    def inflight(self, key):
+        """The task currently computing ``key``, if any"""
+        return self._inflight.get(key)
+
+    def _finish(self, key, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.set(key, task.result())
+
+    async def get_or_compute(self, key, compute):
+        """Return the cached value or await ``compute()``, at most once per key at a time"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(compute())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        else:
+            self.stats["coalesced"] += 1
+        # shield: a disconnecting client must not cancel the call others are awaiting
+        return await asyncio.shield(task)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+analysis_cache = AnalysisCache(
+    max_entries=ANALYSIS_CACHE_SIZE,
+    ttl_seconds=ANALYSIS_CACHE_TTL_SECONDS,
+    path=ANALYSIS_CACHE_PATH or None,
+)
+
+@app.on_event("shutdown")
+async def shutdown_analysis_cache():
+    analysis_cache.close()
+
+# -------------------------
+# OpenAI Client
+# -------------------------
+_openai_client = None
+_llm_semaphore = None
+
+def get_openai_client():
+    """Shared AsyncOpenAI client; retries are handled by chat_completion"""
+    global _openai_client
+    if _openai_client is None:
+        import httpx
+        import openai
+        _openai_client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY or "missing",
+            base_url=OPENAI_BASE_URL or None,
+            timeout=OPENAI_TIMEOUT_SECONDS,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                timeout=OPENAI_TIMEOUT_SECONDS,
+                limits=httpx.Limits(max_connections=LLM_MAX_CONCURRENCY, max_keepalive_connections=LLM_MAX_CONCURRENCY),
+            ),
+        )
+    return _openai_client
+
+def retryable_openai_errors():
+    import openai
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+def get_llm_semaphore():
+    global _llm_semaphore
+    if _llm_semaphore is None:
+        _llm_semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _llm_semaphore
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    """Honour Retry-After when the server sends one, else full-jitter exponential backoff"""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        if retry_after is not None:
+            return min(float(retry_after), 30.0)
+    except ValueError:
+        pass
+    return random.uniform(0, min(30.0, 0.5 * 2 ** attempt))
+
+async def chat_completion(messages, model: str = None, temperature: float = 0.5) -> str:
+    """One chat completion, capped at LLM_MAX_CONCURRENCY in flight, retried on transient errors"""
+    client = get_openai_client()
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            async with get_llm_semaphore():
+                with span("llm_completion"):
+                    response = await client.chat.completions.create(
+                        model=model or ANALYSIS_MODEL,
+                        messages=messages,
+                        temperature=temperature,
+                    )
+            return response.choices[0].message.content
+        except retryable_openai_errors() as e:
+            if attempt == OPENAI_MAX_RETRIES:
+                print(f"OpenAI error after {attempt + 1} attempts: {str(e)}")
+                raise HTTPException(status_code=503, detail="Analysis service unavailable, try again later")
+            await asyncio.sleep(retry_delay(attempt, e))
+
+async def stream_chat_completion(messages, model: str = None, temperature: float = 0.5):
+    """Yield content deltas as the model generates them.
+
+    Opening the stream is retried like ``chat_completion``; once tokens
+    have been forwarded a failure is raised to the caller.
+    """
+    client = get_openai_client()
+    async with get_llm_semaphore():
+        for attempt in range(OPENAI_MAX_RETRIES + 1):
+            try:
+                with span("llm_stream_open"):
+                    stream = await client.chat.completions.create(
+                        model=model or ANALYSIS_MODEL,
+                        messages=messages,
+                        temperature=temperature,
+                        stream=True,
+                    )
+                break
+            except retryable_openai_errors() as e:
+                if attempt == OPENAI_MAX_RETRIES:
+                    print(f"OpenAI error after {attempt + 1} attempts: {str(e)}")
+                    raise HTTPException(status_code=503, detail="Analysis service unavailable, try again later")
+                await asyncio.sleep(retry_delay(attempt, e))
+        with span("llm_stream"):
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+@app.on_event("shutdown")
+async def shutdown_openai_client():
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
+# -------------------------
+# Helpers: Resume Text Preprocessing
+# -------------------------
+_token_encoder = None
+
+def get_token_encoder():
+    """tiktoken encoder for ANALYSIS_MODEL, or False when unavailable (offline, not installed)"""
+    global _token_encoder
+    if _token_encoder is None:
+        try:
+            import tiktoken
+            try:
+                _token_encoder = tiktoken.encoding_for_model(ANALYSIS_MODEL)
+            except KeyError:
+                _token_encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating tokens: {str(e)}")
+            _token_encoder = False
+    return _token_encoder
+
+def count_tokens(text: str) -> int:
+    encoder = get_token_encoder()
+    if encoder:
+        return len(encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    encoder = get_token_encoder()
+    if encoder:
+        return encoder.decode(encoder.encode(text, disallowed_special=())[:max_tokens])
+    return text[:max_tokens * 4]
+
+def normalize_resume_text(text: str) -> str:
+    """Collapse whitespace runs, blank-line runs and repeated page headers/footers"""
+    lines = [re.sub(r"[^\S\n]+", " ", line).strip() for line in text.replace("\x00", " ").splitlines()]
+    counts = Counter(line for line in lines if line)
+    seen = set()
+    out = []
+    for line in lines:
+        if not line:
+            if out and out[-1]:
+                out.append("")
+            continue
+        if counts[line] >= 3 and line in seen:
+            continue  # a header/footer repeated on every page
+        seen.add(line)
+        out.append(line)
+    return "\n".join(out).strip()
+
+def chunk_text(text: str, max_tokens: int):
+    """Split on line boundaries into chunks of at most ``max_tokens``"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line) + 1
+        if line_tokens > max_tokens:
+            # a single runaway line (PDF extraction without newlines)
+            if current:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            step = max_tokens * 4
+            chunks.extend(truncate_tokens(line[i:i + step], max_tokens) for i in range(0, len(line), step))
+            continue
+        if current and current_tokens + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def preprocess_resume_text(content: str):
+    normalized = normalize_resume_text(content)
+    return normalized, count_tokens(content), count_tokens(normalized)
+
+async def prepare_analysis_input(content: str):
+    """Normalize the resume and map-reduce it down to ANALYSIS_MAX_INPUT_TOKENS.
+
+    At most ANALYSIS_MAX_CHUNKS summary calls are made per round: text
+    beyond that many chunks is cut before the map step and reported as
+    ``dropped_tokens``.  Returns ``(text, token_budget)`` where
+    ``token_budget`` reports what the preprocessing used.
+    """
+    text, raw_tokens, tokens = await run_in_threadpool(preprocess_resume_text, content)
+    budget = {
+        "raw_tokens": raw_tokens,
+        "normalized_tokens": tokens,
+        "max_input_tokens": ANALYSIS_MAX_INPUT_TOKENS,
+        "strategy": "direct",
+        "chunks": 0,
+        "summary_calls": 0,
+        "max_chunks": ANALYSIS_MAX_CHUNKS,
+        "dropped_tokens": 0,
+    }
+    map_limit = ANALYSIS_MAX_CHUNKS * ANALYSIS_CHUNK_TOKENS
+    if tokens > ANALYSIS_MAX_INPUT_TOKENS and tokens > map_limit:
+        text = await run_in_threadpool(truncate_tokens, text, map_limit)
+        budget["dropped_tokens"] = tokens - map_limit
+        tokens = map_limit
+    rounds = 0
+    while tokens > ANALYSIS_MAX_INPUT_TOKENS and rounds < 3:
+        chunks = await run_in_threadpool(chunk_text, text, ANALYSIS_CHUNK_TOKENS)
+        if len(chunks) > ANALYSIS_MAX_CHUNKS:
+            # line-boundary chunking can overshoot the cut above by a chunk
+            budget["dropped_tokens"] += sum(count_tokens(chunk) for chunk in chunks[ANALYSIS_MAX_CHUNKS:])
+            chunks = chunks[:ANALYSIS_MAX_CHUNKS]
+        summaries = await asyncio.gather(*[
+            chat_completion([
+                {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+                {"role": "user", "content": ANALYSIS_SUMMARY_PROMPT.format(content=chunk)}
+            ], temperature=0)
+            for chunk in chunks
+        ])
+        text = "\n\n".join(summaries)
+        tokens = count_tokens(text)
+        budget["strategy"] = "map_reduce"
+        budget["chunks"] += len(chunks)
+        budget["summary_calls"] += len(chunks)
+        rounds += 1
+    if tokens > ANALYSIS_MAX_INPUT_TOKENS:
+        text = truncate_tokens(text, ANALYSIS_MAX_INPUT_TOKENS)
+        tokens = ANALYSIS_MAX_INPUT_TOKENS
+        budget["strategy"] += "+truncated"
+    budget["prompt_tokens"] = tokens
+    return text, budget
+
+async def analyze_content(content: str, content_hash: str, cache_key: str) -> dict:
+    """Analysis from the shared analyses store, or a fresh LLM call"""
+    result = await find_cached_analysis(cache_key)
+    if result is not None:
+        return result
+
+    text, token_budget = await prepare_analysis_input(content)
+    analysis = await chat_completion([
+        {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+        {"role": "user", "content": ANALYSIS_USER_PROMPT.format(content=text)}
+    ])
+    result = {"analysis": analysis, "token_budget": token_budget}
+    await store_analysis(cache_key, content_hash, result, ANALYSIS_MODEL)
+    return result
+
+# -------------------------
+# Resume Ingestion Queue
+# -------------------------
+_ingest_queue = None
+_ingest_tasks = []
+
+async def ingest_resume(resume_id, file_path: str):
+    """Parse a saved resume and record the outcome on its document"""
+    try:
+        content = await parse_resume(file_path)
+        await resumes_collection.update_one(
+            {"_id": resume_id},
+            {"$set": {"content": content, "status": "ready", "processed_at": datetime.utcnow()}}
+        )
+        await index_resume(resume_id, content)
+    except Exception as e:
+        error = e.detail if isinstance(e, HTTPException) else str(e)
+        print(f"Resume ingestion error: {error}")
+        await resumes_collection.update_one(
+            {"_id": resume_id},
+            {"$set": {"status": "failed", "error": error, "processed_at": datetime.utcnow()}}
+        )
+
+async def ingest_worker():
+    while True:
+        resume_id, file_path = await _ingest_queue.get()
+        try:
+            await ingest_resume(resume_id, file_path)
+        finally:
+            _ingest_queue.task_done()
+
+def ensure_ingest_workers():
+    """Start the bounded queue and its workers on first use"""
+    global _ingest_queue
+    if _ingest_queue is None:
+        _ingest_queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    if not _ingest_tasks:
+        for _ in range(INGEST_WORKERS):
+            _ingest_tasks.append(asyncio.create_task(ingest_worker()))
+    return _ingest_queue
+
+async def requeue_stale_ingests():
+    """Queue resumes a previous process left ``processing`` again.
+
+    The queue only lives in memory, so a restart drops whatever was
+    waiting in it.  Parsing is idempotent, so a resume another worker is
+    still parsing is at worst parsed twice; one whose upload is gone is
+    marked failed.
+    """
+    stale = await resumes_collection.find(
+        {"status": "processing"}, {"filename": 1, "content_hash": 1}
+    ).to_list(None)
+    queue = ensure_ingest_workers() if stale else None
+    for resume in stale:
+        extension = os.path.splitext(resume["filename"])[1].lower()
+        file_path = os.path.join(UPLOAD_DIR, resume["content_hash"] + extension)
+        if os.path.exists(file_path):
+            await queue.put((resume["_id"], file_path))
+        else:
+            await resumes_collection.update_one(
+                {"_id": resume["_id"]},
+                {"$set": {"status": "failed", "error": "Upload lost before it was processed",
+                          "processed_at": datetime.utcnow()}}
+            )
+    if stale:
+        print(f"✓ Recovered {len(stale)} resumes left processing")
+
+@app.on_event("startup")
+async def startup_ingest_recovery():
+    # waits on the bounded queue, so it must not hold up startup
+    run_in_background(requeue_stale_ingests())
+
+@app.on_event("shutdown")
+async def shutdown_ingest_workers():
+    for task in _ingest_tasks:
+        task.cancel()
+    _ingest_tasks.clear()
+
+# -------------------------
+# Helpers: Serialization
+# -------------------------
+def serialize_job(job: dict, summary: bool = False) -> dict:
+    """Job as returned by the API; ``summary`` trims the description for list views"""
+    description = job.get("description")
+    if summary and description and len(description) > JOB_SUMMARY_CHARS:
+        description = description[:JOB_SUMMARY_CHARS].rsplit(" ", 1)[0] + "…"
+    return {
+        "id": str(job["_id"]),
+        "title": job.get("title"),
+        "company": job.get("company"),
+        "location": job.get("location"),
+        "job_type": job.get("job_type"),
+        "description": description,
+        "requirements": job.get("requirements", []),
+        "salary_range": job.get("salary_range"),
+        "employer_id": str(job["employer_id"]) if job.get("employer_id") else None,
+        "created_at": job.get("created_at"),
+    }
+
+# Fields the server owns; never taken from a client payload
+SERVER_FIELDS = frozenset({"_id", "employer_id", "user_id"})
+
+def client_fields(data: dict) -> dict:
+    """Client-supplied document fields minus ``_id`` and ownership fields"""
+    return {field: value for field, value in data.items() if field not in SERVER_FIELDS}
+
+_orjson = None
+
+def get_orjson():
+    """orjson module, or False to fall back to the standard library"""
+    global _orjson
+    if _orjson is None:
+        try:
+            import orjson
+            _orjson = orjson
+        except ImportError:
+            _orjson = False
+    return _orjson
+
+def json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if "numpy" in sys.modules and isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def dumps_json(content) -> bytes:
+    orjson = get_orjson()
+    if orjson:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON encoded with orjson, ObjectId and datetime included.
+
+    Return it from a route directly: a Response instance bypasses
+    FastAPI's ``jsonable_encoder`` walk, which dominates large lists.
+    """
+    def render(self, content) -> bytes:
+        return dumps_json(content)
+
+def ndjson_requested(request: Request, response_format: Optional[str] = Query(None, alias="format")) -> bool:
+    """True for ``?format=ndjson`` or ``Accept: application/x-ndjson``"""
+    if response_format is not None:
+        return response_format == "ndjson"
+    return "application/x-ndjson" in request.headers.get("accept", "")
+
+async def ndjson_chunks(items):
+    """One JSON document per line, flushed every NDJSON_CHUNK_ITEMS items"""
+    batch = []
+    if hasattr(items, "__aiter__"):
+        async for item in items:
+            batch.append(dumps_json(item))
+            if len(batch) >= NDJSON_CHUNK_ITEMS:
+                yield b"\n".join(batch) + b"\n"
+                batch = []
+    else:
+        for item in items:
+            batch.append(dumps_json(item))
+            if len(batch) >= NDJSON_CHUNK_ITEMS:
+                yield b"\n".join(batch) + b"\n"
+                batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+def list_response(items, ndjson: bool = False, headers: dict = None):
+    """Fast JSON array, or a streamed NDJSON body when the client asked for it"""
+    if ndjson:
+        return StreamingResponse(ndjson_chunks(items), media_type="application/x-ndjson", headers=headers)
+    return FastJSONResponse(items, headers=headers)
+
+# -------------------------
+# Resume-to-Job Matching
+# -------------------------
+MATCH_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it of on or our the to we will with you your".split()
+)
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+def tokenize(text: str):
+    return [t for t in TOKEN_PATTERN.findall(text.lower()) if t not in MATCH_STOPWORDS]
+
+def hashed_term_counts(text: str, n_features: int):
+    """Term frequencies keyed by a stable (crc32) feature hash"""
+    counts = Counter()
+    for token in tokenize(text):
+        counts[zlib.crc32(token.encode()) % n_features] += 1
+    return counts
+
+def job_match_text(job: dict) -> str:
+    requirements = job.get("requirements") or []
+    if isinstance(requirements, str):
+        requirements = [requirements]
+    title = job.get("title") or ""
+    # the title is repeated so it weighs more than a line of description
+    return "\n".join([title, title, job.get("description") or "", *requirements])
+
+def id_sort_key(job_id: str):
+    """``(high, low)`` integers that order ObjectId hex strings like the strings do"""
+    if len(job_id) != 24:
+        return 0, 0
+    try:
+        return int(job_id[:16], 16), int(job_id[16:], 16)
+    except ValueError:
+        return 0, 0
+
+class JobMatcher:
+    """Hashed TF-IDF index over job postings.
+
+    Jobs are L2-normalised TF-IDF rows of a sparse matrix held both
+    row-wise (``indptr``/``indices``/``data``) and column-wise
+    (``col_ptr``/``col_rows``/``col_data``).  Scoring a resume gathers
+    only the posting columns of the resume's own terms and sums them per
+    job with one ``np.bincount``, so the cost follows the postings
+    touched rather than the total number of jobs.
+
+    The index is built once from the jobs collection and then maintained
+    incrementally: ``add_job`` appends a row to a small pending segment
+    (weighted with the current IDF) that is folded into the column index
+    once it reaches MATCH_COMPACT_ROWS.  Per-resume top-K lists are cached
+    and patched with only the rows appended since they were computed.
+    """
+    def __init__(self, n_features=MATCH_HASH_FEATURES, top_k=MATCH_TOP_K,
+                 compact_rows=MATCH_COMPACT_ROWS, cache_size=MATCH_TOPK_CACHE_SIZE):
+        self.n_features = n_features
+        self.top_k = top_k
+        self.compact_rows = compact_rows
+        self.cache_size = cache_size
+        self.job_ids = []
+        self.row_of = {}
+        # row/column arrays are allocated by build(), which runs before first use
+        self.indptr = self.indices = self.tf = self.rows = self.data = None
+        self.col_ptr = self.col_rows = self.col_data = None
+        self.df = self.idf = None
+        self.n_indexed = 0  # rows covered by the column index; the rest are pending
+        self.pending = []  # (features, tf, weights) per appended row
+        self._pending_arrays = None
+        self.top_k_cache = OrderedDict()  # resume_id -> {"query", "rows", "top"}
+        self._id_high = self._id_low = None  # id_sort_key() per row, extended lazily
+        self.stats = {"rebuilds": 0, "appends": 0, "compactions": 0, "top_k_hits": 0, "top_k_misses": 0}
+        self.dirty = True
+        self._lock = None
+
+    def mark_dirty(self):
+        """Force a full rebuild on next use (e.g. after jobs are edited or removed)"""
+        self.dirty = True
+
+    def build(self, jobs):
+        job_ids = []
+        indptr = [0]
+        indices = []
+        tf = []
+        for job in jobs:
+            counts = hashed_term_counts(job_match_text(job), self.n_features)
+            job_ids.append(str(job["_id"]))
+            indices.extend(counts.keys())
+            tf.extend(counts.values())
+            indptr.append(len(indices))
+
+        self.job_ids = job_ids
+        self.row_of = {job_id: row for row, job_id in enumerate(job_ids)}
+        self._id_high = np.zeros(0, dtype=np.uint64)
+        self._id_low = np.zeros(0, dtype=np.uint64)
+        indices = np.asarray(indices, dtype=np.int32)
+        self.df = np.bincount(indices, minlength=self.n_features).astype(np.int32)
+        weighted = self._weighted(
+            np.asarray(indptr, dtype=np.int64), indices, np.asarray(tf, dtype=np.float32), self.df
+        )
+        for name, value in weighted.items():
+            setattr(self, name, value)
+        self.pending = []
+        self._pending_arrays = None
+        self.top_k_cache.clear()
+        self.stats["rebuilds"] += 1
+
+    def _weighted(self, indptr, indices, tf, df):
+        """IDF-weighted, L2-normalised rows and their column index, as new arrays"""
+        n_jobs = len(indptr) - 1
+        rows = np.repeat(np.arange(n_jobs, dtype=np.int32), np.diff(indptr))
+        idf = (np.log((1 + n_jobs) / (1 + df)) + 1).astype(np.float32)
+        data = tf * idf[indices]
+        norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n_jobs))
+        norms[norms == 0] = 1
+        data = (data / norms[rows]).astype(np.float32)
+        order = np.argsort(indices, kind="stable")
+        col_ptr = np.zeros(self.n_features + 1, dtype=np.int64)
+        np.cumsum(np.bincount(indices, minlength=self.n_features), out=col_ptr[1:])
+        return {
+            "indptr": indptr, "indices": indices, "tf": tf, "rows": rows, "idf": idf, "data": data,
+            "col_ptr": col_ptr, "col_rows": rows[order], "col_data": data[order], "n_indexed": n_jobs,
+        }
+
+    def append(self, job: dict):
+        """Add one job as a pending row (``add_jobs`` compacts when the segment is full)"""
+        job_id = str(job["_id"])
+        if job_id in self.row_of:
+            return
+        counts = hashed_term_counts(job_match_text(job), self.n_features)
+        features = np.fromiter(counts.keys(), dtype=np.int32, count=len(counts))
+        tf = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        self.df[features] += 1
+        weights = tf * self.idf[features]
+        norm = np.linalg.norm(weights)
+        if norm:
+            weights /= norm
+        self.row_of[job_id] = len(self.job_ids)
+        self.job_ids.append(job_id)
+        self.pending.append((features, tf, weights))
+        self._pending_arrays = None
+        self.stats["appends"] += 1
+
+    def _compacted(self, pending):
+        """Arrays with ``pending`` folded into the column index; leaves the live ones untouched"""
+        lengths = [len(features) for features, _, _ in pending]
+        indices = np.concatenate([self.indices] + [features for features, _, _ in pending])
+        tf = np.concatenate([self.tf] + [tf for _, tf, _ in pending])
+        indptr = np.concatenate([self.indptr, self.indptr[-1] + np.cumsum(lengths)])
+        return self._weighted(indptr, indices, tf, self.df)
+
+    def _install(self, weighted, folded):
+        for name, value in weighted.items():
+            setattr(self, name, value)
+        self.pending = self.pending[folded:]
+        self._pending_arrays = None
+        # IDF moved for every row, so cached top-K lists are recomputed on demand
+        self.top_k_cache.clear()
+        self.stats["compactions"] += 1
+
+    def compact(self):
+        """Fold pending rows into the column index and refresh IDF weights"""
+        if self.pending:
+            self._install(self._compacted(self.pending), len(self.pending))
+
+    def query_vector(self, text: str):
+        """Sparse L2-normalised TF-IDF vector for a resume as ``(features, weights)``"""
+        counts = hashed_term_counts(text, self.n_features)
+        keys = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+        values = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        values *= self.idf[keys]
+        norm = np.linalg.norm(values)
+        if norm:
+            values /= norm
+        return keys, values
+
+    def _indexed_scores(self, query):
+        keys, values = query
+        starts = self.col_ptr[keys]
+        lengths = self.col_ptr[keys + 1] - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(self.n_indexed, dtype=np.float64)
+        # positions of every posting of every query term, without a Python loop
+        offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        positions = offsets + np.arange(total)
+        weights = self.col_data[positions] * np.repeat(values, lengths)
+        return np.bincount(self.col_rows[positions], weights=weights, minlength=self.n_indexed)
+
+    def _pending_scores(self, query, first=0):
+        """Scores of pending rows ``first..`` (0 = first pending row)"""
+        if first >= len(self.pending):
+            return np.zeros(0, dtype=np.float64)
+        if self._pending_arrays is None:
+            lengths = [len(features) for features, _, _ in self.pending]
+            self._pending_arrays = (
+                np.concatenate([features for features, _, _ in self.pending]),
+                np.concatenate([weights for _, _, weights in self.pending]),
+                np.repeat(np.arange(len(self.pending)), lengths),
+            )
+        features, weights, rows = self._pending_arrays
+        keys, values = query
+        dense = np.zeros(self.n_features, dtype=np.float32)
+        dense[keys] = values
+        scores = np.bincount(rows, weights=weights * dense[features], minlength=len(self.pending))
+        return scores[first:]
+
+    def row_score(self, query, row):
+        """Cosine similarity of ``query`` against a single job row, indexed or pending"""
+        if row < self.n_indexed:
+            start, end = self.indptr[row], self.indptr[row + 1]
+            features, weights = self.indices[start:end], self.data[start:end]
+        else:
+            features, _, weights = self.pending[row - self.n_indexed]
+        keys, values = query
+        if len(keys) == 0 or len(features) == 0:
+            return 0.0
+        order = np.argsort(keys)
+        keys, values = keys[order], values[order]
+        positions = np.minimum(np.searchsorted(keys, features), len(keys) - 1)
+        hit = keys[positions] == features
+        return float((values[positions[hit]] * weights[hit]).sum(dtype=np.float64))
+
+    def scores(self, query):
+        """Cosine similarity of ``query`` against every job, indexed and pending"""
+        return np.concatenate([self._indexed_scores(query), self._pending_scores(query)])
+
+    def id_keys(self):
+        """Per-row ``(high, low)`` id sort keys, to break score ties like the job ids do"""
+        have, n = len(self._id_high), len(self.job_ids)
+        if have < n:
+            keys = [id_sort_key(job_id) for job_id in self.job_ids[have:]]
+            self._id_high = np.concatenate([self._id_high, np.array([k[0] for k in keys], dtype=np.uint64)])
+            self._id_low = np.concatenate([self._id_low, np.array([k[1] for k in keys], dtype=np.uint64)])
+        return self._id_high[:n], self._id_low[:n]
+
+    def page(self, scores, candidates=None, after=None, limit=JOBS_PAGE_SIZE):
+        """``[(job_id, score)]`` ordered by ``(score, job_id)`` descending.
+
+        ``candidates`` restricts the rows (job ids, None = every job) and
+        ``after`` is the ``(score, job_id)`` the previous page ended on.
+        The best ``limit`` rows below it are picked with ``argpartition``;
+        only those (plus ties at the boundary score) are sorted.
+        """
+        high, low = self.id_keys()
+        if candidates is None:
+            rows = np.arange(len(scores))
+        else:
+            row_of = self.row_of
+            rows = np.fromiter((row_of[i] for i in candidates if i in row_of), dtype=np.int64)
+        if after is not None:
+            after_score, (after_high, after_low) = after[0], id_sort_key(after[1])
+            s, h = scores[rows], high[rows]
+            below = (s < after_score) | ((s == after_score) & (
+                (h < after_high) | ((h == after_high) & (low[rows] < after_low))
+            ))
+            rows = rows[below]
+        k = min(limit, len(rows))
+        if k == 0:
+            return []
+        if k < len(rows):
+            s = scores[rows]
+            threshold = s[np.argpartition(-s, k - 1)[k - 1]]
+            rows = rows[s >= threshold]
+        rows = rows[np.lexsort((low[rows], high[rows], scores[rows]))[::-1][:k]]
+        return [(self.job_ids[row], float(scores[row])) for row in rows.tolist()]
+
+    def _top(self, scores, row_offset=0):
+        k = min(self.top_k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        return [(float(scores[i]), int(i) + row_offset) for i in best if scores[i] > 0]
+
+    def top_matches(self, resume_id: str, text: str):
+        """Cached ``[(score, row)]`` best matches for a resume, best first"""
+        entry = self.top_k_cache.get(resume_id)
+        if entry is None:
+            self.stats["top_k_misses"] += 1
+            query = self.query_vector(text)
+            top = self._top(self.scores(query))
+            entry = {"query": query, "rows": len(self.job_ids), "top": top}
+            self.top_k_cache[resume_id] = entry
+            while len(self.top_k_cache) > self.cache_size:
+                self.top_k_cache.popitem(last=False)
+        else:
+            self.stats["top_k_hits"] += 1
+            self.top_k_cache.move_to_end(resume_id)
+            if entry["rows"] < len(self.job_ids):
+                # patch with the jobs appended since this list was computed
+                first = entry["rows"] - self.n_indexed
+                new = self._top(self._pending_scores(entry["query"], first), entry["rows"])
+                entry["top"] = entry["top"] + new
+                entry["rows"] = len(self.job_ids)
+        entry["top"] = sorted(entry["top"], reverse=True)[:self.top_k]
+        return entry["top"]
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def ensure_built(self):
+        await job_feed.refresh()
+        async with self._get_lock():
+            if self.dirty:
+                self.dirty = False
+                try:
+                    jobs = await jobs_collection.find({}).to_list(None)
+                    await run_in_threadpool(self.build, jobs)
+                except BaseException:
+                    # e.g. the request was cancelled: the next caller rebuilds
+                    self.dirty = True
+                    raise
+
+    async def add_job(self, job: dict):
+        await self.add_jobs([job])
+
+    async def add_jobs(self, jobs):
+        async with self._get_lock():
+            # before the first build the jobs are simply picked up by build()
+            if not self.dirty:
+                for job in jobs:
+                    self.append(job)
+                if len(self.pending) >= self.compact_rows:
+                    # re-weighting sorts every posting: do it in a thread, where
+                    # readers on the loop keep the current arrays until the swap
+                    pending = list(self.pending)
+                    weighted = await run_in_threadpool(self._compacted, pending)
+                    self._install(weighted, len(pending))
+
+    async def _percentages(self, resume_id: str, resume_text: str):
+        await self.ensure_built()
+        entry = self.top_k_cache.get(resume_id)
+        query = entry["query"] if entry else await run_in_threadpool(self.query_vector, resume_text)
+        return np.round(self.scores(query) * 100, 1)
+
+    async def match_score(self, resume_id: str, resume_text: str, job_id: str):
+        """One job's 0-100 match score, or None when it isn't indexed"""
+        await self.ensure_built()
+        entry = self.top_k_cache.get(resume_id)
+        query = entry["query"] if entry else await run_in_threadpool(self.query_vector, resume_text)
+        row = self.row_of.get(job_id)
+        if row is None:
+            return None
+        return float(np.round(self.row_score(query, row) * 100, 1))
+
+    async def ranked_page(self, resume_id: str, resume_text: str, candidates=None, after=None,
+                          limit: int = JOBS_PAGE_SIZE):
+        """One page of ``[(job_id, match_score)]``, best first; see ``page``"""
+        scores = await self._percentages(resume_id, resume_text)
+        return self.page(scores, candidates, after, limit)
+
+    async def matches(self, resume_id: str, resume_text: str, limit: int = None):
+        """``[(job_id, match_score)]`` best first, served from the top-K cache"""
+        await self.ensure_built()
+        # add_jobs() appends and compacts under the same lock, so the arrays
+        # can't be swapped out while a worker thread is scoring them
+        async with self._get_lock():
+            if resume_id in self.top_k_cache:
+                top = self.top_matches(resume_id, resume_text)
+            else:
+                top = await run_in_threadpool(self.top_matches, resume_id, resume_text)
+            return [(self.job_ids[row], round(score * 100, 1)) for score, row in top[:limit]]
+
+job_matcher = JobMatcher()
+_background_tasks = set()
+
+def run_in_background(coro):
+    """Fire-and-forget a coroutine, keeping a reference until it finishes"""
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+# -------------------------
+# Semantic Matching (embeddings + IVF ANN index)
+# -------------------------
+_embedding_model = None
+
+def get_embedding_model():
+    """Local sentence-transformers model, or False to use the hashed fallback"""
+    global _embedding_model
+    if _embedding_model is None:
+        _embedding_model = False
+        if EMBEDDING_MODEL:
+            try:
+                from sentence_transformers import SentenceTransformer
+                _embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+            except Exception as e:
+                print(f"Embedding model unavailable, using hashed embeddings: {str(e)}")
+    return _embedding_model
+
+def hashed_embeddings(texts, dim: int = None):
+    """Deterministic signed feature-hashing embeddings over words and word bigrams"""
+    dim = dim or EMBEDDING_DIM
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        features.update(a + " " + b for a, b in zip(tokens, tokens[1:]))
+        for feature, count in features.items():
+            h = zlib.crc32(feature.encode())
+            sign = 1.0 if zlib.crc32(feature.encode(), 0x9E3779B9) & 1 else -1.0
+            vectors[row, h % dim] += sign * (1.0 + np.log(count))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+def embed_texts(texts):
+    """L2-normalised embeddings, EMBEDDING_BATCH_SIZE texts at a time"""
+    model = get_embedding_model()
+    batches = []
+    for i in range(0, len(texts), EMBEDDING_BATCH_SIZE):
+        batch = texts[i:i + EMBEDDING_BATCH_SIZE]
+        if model:
+            batches.append(np.asarray(model.encode(batch, normalize_embeddings=True), dtype=np.float32))
+        else:
+            batches.append(hashed_embeddings(batch))
+    if not batches:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    return np.concatenate(batches)
+
+class IVFIndex:
+    """Inverted-file ANN index over unit vectors (inner product = cosine).
+
+    Below ``train_min`` vectors it searches exhaustively.  Past that it
+    trains ~sqrt(N) spherical k-means centroids and a query only scans
+    the ``nprobe`` closest lists, so search cost grows sub-linearly with
+    N.  Vectors added later join their nearest list; the quantizer is
+    retrained whenever the index has grown 4x since the last training.
+    """
+    def __init__(self, dim, nprobe=8, train_min=2048):
+        self.dim = dim
+        self.nprobe = nprobe
+        self.train_min = train_min
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.size = 0
+        self.ids = []
+        self.centroids = None
+        self.lists = []
+        self._list_arrays = {}
+        self.trained_size = 0
+
+    def add(self, ids, vectors):
+        n = len(ids)
+        if n == 0:
+            return
+        if self.size + n > len(self.vectors):
+            capacity = max(self.size + n, 2 * len(self.vectors), 1024)
+            grown = np.zeros((capacity, self.dim), dtype=np.float32)
+            grown[:self.size] = self.vectors[:self.size]
+            self.vectors = grown
+        first = self.size
+        self.vectors[first:first + n] = vectors
+        self.ids.extend(ids)
+        self.size += n
+
+        if self.size >= self.train_min and (self.centroids is None or self.size >= 4 * self.trained_size):
+            self.train()
+        elif self.centroids is not None:
+            self._assign(np.arange(first, first + n))
+
+    def _assign(self, rows):
+        for start in range(0, len(rows), 65536):
+            chunk = rows[start:start + 65536]
+            nearest = np.argmax(self.vectors[chunk] @ self.centroids.T, axis=1)
+            for row, centroid in zip(chunk.tolist(), nearest.tolist()):
+                self.lists[centroid].append(row)
+                self._list_arrays.pop(centroid, None)
+
+    def train(self, iterations=10):
+        data = self.vectors[:self.size]
+        nlist = max(1, int(np.sqrt(self.size)))
+        rng = np.random.default_rng(0)
+        sample = data[rng.choice(self.size, size=min(self.size, 64 * nlist), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(iterations):
+            nearest = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, sample)
+            norms = np.linalg.norm(sums, axis=1)
+            empty = norms == 0
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            norms[empty] = np.linalg.norm(sums[empty], axis=1)
+            norms[norms == 0] = 1
+            centroids = sums / norms[:, None]
+        self.centroids = centroids.astype(np.float32)
+        self.lists = [[] for _ in range(nlist)]
+        self._list_arrays = {}
+        self._assign(np.arange(self.size))
+        self.trained_size = self.size
+
+    def _list_array(self, centroid):
+        rows = self._list_arrays.get(centroid)
+        if rows is None:
+            rows = np.asarray(self.lists[centroid], dtype=np.int64)
+            self._list_arrays[centroid] = rows
+        return rows
+
+    def search(self, query, k):
+        """``[(score, id)]`` of the (approximately) ``k`` nearest vectors, best first"""
+        if self.size == 0:
+            return []
+        if self.centroids is None:
+            rows = np.arange(self.size)
+        else:
+            nprobe = min(self.nprobe, len(self.centroids))
+            probes = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+            rows = np.concatenate([self._list_array(c) for c in probes.tolist()])
+            if len(rows) == 0:
+                return []
+        scores = self.vectors[rows] @ query
+        k = min(k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return [(float(scores[i]), self.ids[rows[i]]) for i in best]
+
+class SemanticIndex:
+    """Job embeddings in an IVF index plus cached resume embeddings.
+
+    Embeddings are computed in batches when jobs and resumes are ingested;
+    a query only embeds a resume that was never seen (e.g. after a restart).
+    """
+    def __init__(self, cache_size=MATCH_TOPK_CACHE_SIZE):
+        self.index = None
+        self.job_ids = set()
+        self.resume_vectors = OrderedDict()
+        self.cache_size = cache_size
+        self.dirty = True
+        self._lock = None
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _add_jobs(self, jobs):
+        jobs = [job for job in jobs if str(job["_id"]) not in self.job_ids]
+        if not jobs:
+            return
+        self.job_ids.update(str(job["_id"]) for job in jobs)
+        vectors = embed_texts([job_match_text(job) for job in jobs])
+        if self.index is None:
+            self.index = IVFIndex(vectors.shape[1], nprobe=ANN_NPROBE, train_min=ANN_TRAIN_MIN)
+        self.index.add([str(job["_id"]) for job in jobs], vectors)
+
+    async def ensure_built(self):
+        await job_feed.refresh()
+        async with self._get_lock():
+            if self.dirty:
+                self.dirty = False
+                self.index = None
+                self.job_ids = set()
+                try:
+                    jobs = await jobs_collection.find({}).to_list(None)
+                    await run_in_threadpool(self._add_jobs, jobs)
+                except BaseException:
+                    # e.g. the request was cancelled: the next caller rebuilds
+                    self.dirty = True
+                    raise
+
+    async def add_jobs(self, jobs):
+        async with self._get_lock():
+            # before the first build the jobs are picked up by ensure_built()
+            if not self.dirty:
+                await run_in_threadpool(self._add_jobs, jobs)
+
+    def _remember_resume(self, resume_id, vector):
+        self.resume_vectors[resume_id] = vector
+        self.resume_vectors.move_to_end(resume_id)
+        while len(self.resume_vectors) > self.cache_size:
+            self.resume_vectors.popitem(last=False)
+
+    async def add_resume(self, resume_id: str, text: str):
+        vector = (await run_in_threadpool(embed_texts, [text]))[0]
+        self._remember_resume(resume_id, vector)
+        return vector
+
+    async def matches(self, resume_id: str, text: str, k: int):
+        """``[(job_id, similarity)]`` with similarity as a 0-100 percentage"""
+        await self.ensure_built()
+        vector = self.resume_vectors.get(resume_id)
+        if vector is None:
+            vector = await self.add_resume(resume_id, text)
+        async with self._get_lock():
+            # add_jobs mutates the index in a thread (training swaps the
+            # centroids before the lists): search it only while that can't run
+            if self.index is None:
+                return []
+            results = await run_in_threadpool(self.index.search, vector, k)
+        return [(job_id, round(max(score, 0.0) * 100, 1)) for score, job_id in results]
 
-# Initialize OpenAI
-openai.api_key = OPENAI_API_KEY
+semantic_index = SemanticIndex()
 
 # -------------------------
-# Initialize FastAPI
+# Job Search (inverted index + cursor pagination)
 # -------------------------
-app = FastAPI(title="Resume AI Backend")
+class JobSearchIndex:
+    """Inverted token index over job title, company, location and description.
 
-# CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    Every query term is prefix-matched through a sorted vocabulary (bisect)
+    and terms are ANDed.  ``company``/``location`` filters use their own
+    per-field postings.  Ids are kept in one sorted list (ObjectId hex
+    sorts by creation time) so unfiltered pages are a bisect away.
+    """
+    FIELDS = ("title", "company", "location", "description")
+    FILTER_FIELDS = ("company", "location")
+    STRUCTURES = ("postings", "vocabulary", "field_postings", "field_vocabulary", "ordered_ids")
 
-# -------------------------
-# In-Memory Storage (Development)
-# -------------------------
-class InMemoryCollection:
-    """Simple in-memory storage for development"""
     def __init__(self):
-        self.data = {}
-    
-    async def find_one(self, query):
-        for doc in self.data.values():
-            if all(doc.get(k) == v for k, v in query.items()):
-                return doc
-        return None
-    
-    async def insert_one(self, doc):
-        doc_id = ObjectId()
-        doc["_id"] = doc_id
-        self.data[str(doc_id)] = doc
-        
-        class InsertResult:
-            def __init__(self, inserted_id):
-                self.inserted_id = inserted_id
-        
-        return InsertResult(doc_id)
-    
-    async def find(self, query):
-        results = []
-        for doc in self.data.values():
-            if all(doc.get(k) == v for k, v in query.items()):
-                results.append(doc)
-        
-        class FindResult:
-            def __init__(self, docs):
-                self.docs = docs
-            
-            async def to_list(self, length):
-                return self.docs
-        
-        return FindResult(results)
+        self.postings = {}
+        self.vocabulary = []
+        self.field_postings = {field: {} for field in self.FILTER_FIELDS}
+        self.field_vocabulary = {field: [] for field in self.FILTER_FIELDS}
+        self.ordered_ids = []
+        self.dirty = True
+        self._lock = None
 
-# Use in-memory collections for development
-users_collection = InMemoryCollection()
-resumes_collection = InMemoryCollection()
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
 
-print("✓ Using in-memory storage for development")
+    @staticmethod
+    def _post(postings, vocabulary, token, job_id):
+        ids = postings.get(token)
+        if ids is None:
+            ids = postings[token] = set()
+            bisect.insort(vocabulary, token)
+        ids.add(job_id)
 
-# -------------------------
-# Pydantic Models
-# -------------------------
-class UserCreate(BaseModel):
-    email: str
-    password: str
-    name: Optional[str] = None
-    role: Optional[str] = "job_seeker"
+    def add(self, job: dict):
+        job_id = str(job["_id"])
+        position = bisect.bisect_left(self.ordered_ids, job_id)
+        if position < len(self.ordered_ids) and self.ordered_ids[position] == job_id:
+            return
+        self.ordered_ids.insert(position, job_id)
+        for field in self.FIELDS:
+            tokens = set(tokenize(str(job.get(field) or "")))
+            for token in tokens:
+                self._post(self.postings, self.vocabulary, token, job_id)
+            if field in self.field_postings:
+                for token in tokens:
+                    self._post(self.field_postings[field], self.field_vocabulary[field], token, job_id)
 
-class UserLogin(BaseModel):
-    email: str
-    password: str
+    def build(self, jobs):
+        """A new index over ``jobs``; runs in a worker thread, leaving this one untouched"""
+        built = JobSearchIndex()
+        for job in jobs:
+            built.add(job)
+        return built
+
+    @staticmethod
+    def _prefix_ids(postings, vocabulary, prefix):
+        start = bisect.bisect_left(vocabulary, prefix)
+        end = bisect.bisect_left(vocabulary, prefix + "\uffff")
+        if end - start == 1:
+            return postings[vocabulary[start]]
+        ids = set()
+        for token in vocabulary[start:end]:
+            ids |= postings[token]
+        return ids
+
+    def search(self, q: str = None, company: str = None, location: str = None):
+        """Matching job ids, or None when nothing narrows the search"""
+        terms = [(self.postings, self.vocabulary, token) for token in tokenize(q or "")]
+        for field, value in (("company", company), ("location", location)):
+            terms.extend(
+                (self.field_postings[field], self.field_vocabulary[field], token)
+                for token in tokenize(value or "")
+            )
+        if not terms:
+            return None
+        matches = [self._prefix_ids(postings, vocabulary, token) for postings, vocabulary, token in terms]
+        matches.sort(key=len)
+        result = set(matches[0])
+        for ids in matches[1:]:
+            result &= ids
+            if not result:
+                break
+        return result
+
+    async def ensure_built(self):
+        await job_feed.refresh()
+        async with self._get_lock():
+            if self.dirty:
+                jobs = await jobs_collection.find({}).to_list(None)
+                built = await run_in_threadpool(self.build, jobs)
+                # swapped in on the loop while the lock is held, so add_jobs()
+                # calls waiting on it apply to the new structures
+                for name in self.STRUCTURES:
+                    setattr(self, name, getattr(built, name))
+                self.dirty = False
+
+    async def add_job(self, job: dict):
+        await self.add_jobs([job])
+
+    async def add_jobs(self, jobs):
+        async with self._get_lock():
+            if not self.dirty:
+                for job in jobs:
+                    self.add(job)
+
+job_search_index = JobSearchIndex()
+
+class JobFeed:
+    """Keeps the process-local job indexes in step with the job store.
+
+    Jobs created by this process are added to every index directly.  With
+    a shared store (MongoDB) other workers insert jobs too, so at most
+    every JOB_INDEX_REFRESH_SECONDS the store is polled for ids generated
+    since the previous poll, minus an overlap for inserts still in flight
+    and clock skew between hosts, and the jobs not seen yet are added.
+    """
+    def __init__(self, interval=JOB_INDEX_REFRESH_SECONDS, overlap=JOB_INDEX_REFRESH_OVERLAP_SECONDS):
+        self.interval = interval
+        self.overlap = overlap
+        # older jobs are read by the indexes' initial builds
+        self.since = time.time() - overlap
+        self.checked_at = 0.0
+        self.recent = {}  # job_id -> when seen, for ids still inside the polled window
+        self.stats = {"polls": 0, "picked_up": 0}
+        self._lock = None
+
+    def _get_lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def add_jobs(self, jobs):
+        """Index new jobs in the matcher, the semantic index and the search index"""
+        seen = time.time()
+        for job in jobs:
+            self.recent[str(job["_id"])] = seen
+        await job_matcher.add_jobs(jobs)
+        await semantic_index.add_jobs(jobs)
+        await job_search_index.add_jobs(jobs)
+
+    async def refresh(self):
+        """Pick up jobs other workers added to a shared store (throttled)"""
+        if not self.interval or not getattr(storage, "shared", False):
+            return
+        if time.time() - self.checked_at < self.interval:
+            return
+        async with self._get_lock():
+            started = time.time()
+            if started - self.checked_at < self.interval:
+                return
+            self.checked_at = started
+            since = ObjectId.from_datetime(datetime.utcfromtimestamp(self.since))
+            jobs = await jobs_collection.find({"_id": {"$gte": since}}).to_list(None)
+            new = [job for job in jobs if str(job["_id"]) not in self.recent]
+            self.since = started - self.overlap
+            self.recent = {job_id: seen for job_id, seen in self.recent.items() if seen >= self.since}
+            self.stats["polls"] += 1
+            if new:
+                self.stats["picked_up"] += len(new)
+                await self.add_jobs(new)
+
+job_feed = JobFeed()
+
+def encode_cursor(data: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def page_newest_first(ordered_ids, ids, after, limit):
+    """Page of ids, newest first, strictly older than ``after``"""
+    if ids is None:
+        end = bisect.bisect_left(ordered_ids, after) if after else len(ordered_ids)
+        return ordered_ids[max(0, end - limit - 1):end][::-1]
+    # a partial selection: pages stay O(matches) instead of sorting them all
+    return heapq.nlargest(limit + 1, (i for i in ids if not after or i < after))
+
+async def index_resume(resume_id, content: str):
+    """Precompute a new resume's keyword top-K and its embedding"""
+    await job_matcher.matches(str(resume_id), content)
+    await semantic_index.add_resume(str(resume_id), content)
+
+async def latest_resume(user_id: str):
+    resumes = await resumes_collection.find(
+        {"user_id": ObjectId(user_id), "status": "ready"}, {"content": 1, "created_at": 1}
+    ).sort("created_at", -1).limit(1).to_list(1)
+    return resumes[0] if resumes else None
+
+async def caller_resume(authorization: Optional[str]):
+    """Latest parsed resume of the (optionally) authenticated caller, or None"""
+    user_id = optional_user_id(authorization)
+    if user_id is None:
+        return None
+    return await latest_resume(user_id)
 
 # -------------------------
-# Helpers: Parse PDF/DOCX
+# Helpers: Password Hashing
 # -------------------------
-def parse_pdf(file_path: str) -> str:
-    text = ""
-    with open(file_path, "rb") as f:
-        reader = PdfReader(f)
-        for page in reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
+# bcrypt releases the GIL, so a small dedicated thread pool hashes in
+# parallel without touching the event loop or starving the default pool.
+_password_executor = None
+password_stats = {
+    "pending": 0,
+    "running": 0,
+    "max_pending": 0,
+    "rejected": 0,
+    "hashes": 0,
+    "verifications": 0,
+    "rehashes": 0,
+}
 
-def parse_docx(file_path: str) -> str:
-    doc = docx.Document(file_path)
-    return "\n".join([para.text for para in doc.paragraphs])
+def get_password_executor():
+    global _password_executor
+    if _password_executor is None:
+        _password_executor = ThreadPoolExecutor(max_workers=PASSWORD_WORKERS, thread_name_prefix="bcrypt")
+    return _password_executor
+
+def _count_running(delta):
+    password_stats["running"] += delta
+
+def _count_on_loop(loop, delta):
+    # ``+=`` from several pool threads is not atomic; only the loop writes the stats
+    try:
+        loop.call_soon_threadsafe(_count_running, delta)
+    except RuntimeError:
+        pass  # loop already closed at shutdown
+
+def _run_counted(loop, func, *args):
+    _count_on_loop(loop, 1)
+    try:
+        return func(*args)
+    finally:
+        _count_on_loop(loop, -1)
+
+async def run_password_job(func, *args):
+    """Run a bcrypt call on the password pool, shedding load past PASSWORD_QUEUE_LIMIT"""
+    if password_stats["pending"] >= PASSWORD_QUEUE_LIMIT:
+        password_stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Server busy, try again shortly")
+    password_stats["pending"] += 1
+    password_stats["max_pending"] = max(password_stats["max_pending"], password_stats["pending"])
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_password_executor(), _run_counted, loop, func, *args)
+    finally:
+        password_stats["pending"] -= 1
+
+async def hash_password(password: str) -> str:
+    import bcrypt
+    password_stats["hashes"] += 1
+    with span("bcrypt_hash"):
+        hashed = await run_password_job(bcrypt.hashpw, password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+    return hashed.decode()
+
+async def verify_password(password: str, hashed: str) -> bool:
+    import bcrypt
+    password_stats["verifications"] += 1
+    with span("bcrypt_verify"):
+        return await run_password_job(bcrypt.checkpw, password.encode(), hashed.encode())
+
+def password_needs_rehash(hashed: str) -> bool:
+    """True when the stored hash uses a lower cost than BCRYPT_ROUNDS"""
+    try:
+        return int(hashed.split("$")[2]) < BCRYPT_ROUNDS
+    except (IndexError, ValueError):
+        return False
+
+_rehashing = set()
+
+async def upgrade_password_hash(user_id, password: str):
+    """Re-hash a legacy low-cost password at the current cost, once per user"""
+    if user_id in _rehashing:
+        return
+    _rehashing.add(user_id)
+    try:
+        password_stats["rehashes"] += 1
+        await users_collection.update_one({"_id": user_id}, {"$set": {"password": await hash_password(password)}})
+    finally:
+        _rehashing.discard(user_id)
+
+@app.on_event("shutdown")
+async def shutdown_password_pool():
+    if _password_executor is not None:
+        _password_executor.shutdown(wait=False, cancel_futures=True)
 
 # -------------------------
 # JWT Helpers
@@ -131,22 +2733,75 @@ def create_token(user_id: str, email: str, name: str, role: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm="HS256")
 
-def verify_token(token: str = Header(None)):
+# Verified tokens are cached by their raw string until min(exp, TTL), so hot
+# polling endpoints skip the HMAC check; failures are never cached.
+_token_cache = OrderedDict()
+_user_cache = OrderedDict()
+auth_stats = {"token_hits": 0, "token_misses": 0, "user_hits": 0, "user_misses": 0}
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    return authorization[7:] if authorization.startswith("Bearer ") else authorization
+
+def decode_token(token: str) -> dict:
+    """Verify a JWT, serving repeats from the token cache; raises jwt.InvalidTokenError"""
+    now = time.time()
+    entry = _token_cache.get(token)
+    if entry is not None:
+        payload, expires_at = entry
+        if expires_at > now:
+            _token_cache.move_to_end(token)
+            auth_stats["token_hits"] += 1
+            return payload
+        del _token_cache[token]
+    auth_stats["token_misses"] += 1
+    with span("jwt_decode"):
+        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
+    if AUTH_TOKEN_CACHE_SIZE > 0:
+        _token_cache[token] = (payload, min(payload.get("exp", now), now + AUTH_TOKEN_CACHE_TTL))
+        if len(_token_cache) > AUTH_TOKEN_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+    return payload
+
+def optional_user_id(authorization: Optional[str]):
+    """User id from a Bearer token, or None when absent or invalid"""
+    token = bearer_token(authorization)
     if not token:
-        raise HTTPException(status_code=401, detail="Missing token")
-    
-    # Handle Bearer token
-    if token.startswith("Bearer "):
-        token = token[7:]
-    
+        return None
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        return payload
+        return decode_token(token)["sub"]
+    except jwt.InvalidTokenError:
+        return None
+
+def verify_token(authorization: Optional[str] = Header(None)) -> dict:
+    """FastAPI dependency resolving the JWT payload of the calling user"""
+    token = bearer_token(authorization)
+    if not token:
+        raise HTTPException(status_code=401, detail="Missing authorization header")
+    try:
+        return decode_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def load_user(user_id: str):
+    """User document by id, cached for AUTH_USER_CACHE_TTL seconds"""
+    now = time.time()
+    entry = _user_cache.get(user_id)
+    if entry is not None and entry[1] > now:
+        auth_stats["user_hits"] += 1
+        return entry[0]
+    auth_stats["user_misses"] += 1
+    user = await users_collection.find_one({"_id": ObjectId(user_id)}, {"password": 0})
+    if user is not None and AUTH_USER_CACHE_TTL > 0:
+        _user_cache[user_id] = (user, now + AUTH_USER_CACHE_TTL)
+        _user_cache.move_to_end(user_id)
+        if len(_user_cache) > AUTH_TOKEN_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+    return user
+
 # -------------------------
 # Routes
 # -------------------------
@@ -155,6 +2810,46 @@ def verify_token(token: str = Header(None)):
 async def root():
     return {"message": "Resume AI Backend is running!"}
 
+def cache_samples():
+    """``{(cache,): (hits, misses)}`` from the caches' own counters"""
+    return {
+        ("analysis",): (analysis_cache.stats["hits"], analysis_cache.stats["misses"]),
+        ("parsed_content",): (dedup_stats["parse_hits"], dedup_stats["parse_misses"]),
+        ("stored_analysis",): (dedup_stats["analysis_hits"], dedup_stats["analysis_misses"]),
+        ("auth_token",): (auth_stats["token_hits"], auth_stats["token_misses"]),
+        ("auth_user",): (auth_stats["user_hits"], auth_stats["user_misses"]),
+        ("match_top_k",): (job_matcher.stats["top_k_hits"], job_matcher.stats["top_k_misses"]),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text-format metrics"""
+    caches = cache_samples()
+    lines = request_latency.render()
+    lines += render_samples(
+        "http_requests_in_flight", "Requests currently being handled", "gauge",
+        ("method", "route"), requests_in_flight,
+    )
+    lines += span_latency.render()
+    lines += db_latency.render()
+    lines += render_samples(
+        "app_cache_hits_total", "Cache hits", "counter", ("cache",),
+        {labels: hits for labels, (hits, _) in caches.items()},
+    )
+    lines += render_samples(
+        "app_cache_misses_total", "Cache misses", "counter", ("cache",),
+        {labels: misses for labels, (_, misses) in caches.items()},
+    )
+    lines += render_samples(
+        "app_cache_hit_ratio", "Hits / (hits + misses) since start", "gauge", ("cache",),
+        {labels: round(hits / (hits + misses), 4) for labels, (hits, misses) in caches.items() if hits + misses},
+    )
+    lines += render_samples(
+        "app_password_pool", "bcrypt pool queue depth and counters", "gauge", ("stat",),
+        {(name,): value for name, value in password_stats.items()},
+    )
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
+
 # ==================== AUTH ROUTES ====================
 
 @app.post("/api/auth/signup")
@@ -165,15 +2860,18 @@ async def signup(user: UserCreate):
         if existing:
             raise HTTPException(status_code=400, detail="Email already exists")
 
-        hashed_pw = bcrypt.hashpw(user.password.encode(), bcrypt.gensalt())
+        hashed_pw = await hash_password(user.password)
         user_doc = {
             "email": user.email,
             "name": user.name or user.email.split("@")[0],
-            "password": hashed_pw.decode(),
+            "password": hashed_pw,
             "role": user.role,
             "created_at": datetime.utcnow()
         }
-        result = await users_collection.insert_one(user_doc)
+        try:
+            result = await users_collection.insert_one(user_doc)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Email already exists")
         
         token = create_token(str(result.inserted_id), user.email, user_doc["name"], user.role)
         return {
@@ -198,8 +2896,10 @@ async def login(user: UserLogin):
     if not db_user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
-    if not bcrypt.checkpw(user.password.encode(), db_user["password"].encode()):
+    if not await verify_password(user.password, db_user["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if password_needs_rehash(db_user["password"]):
+        run_in_background(upgrade_password_hash(db_user["_id"], user.password))
     
     token = create_token(str(db_user["_id"]), db_user["email"], db_user["name"], db_user["role"])
     return {
@@ -212,174 +2912,536 @@ async def login(user: UserLogin):
         }
     }
 
+@app.get("/api/auth/hash-pool/stats")
+async def get_password_pool_stats():
+    """Password hashing pool queue depth and counters"""
+    return {**password_stats, "workers": PASSWORD_WORKERS, "bcrypt_rounds": BCRYPT_ROUNDS}
+
 @app.get("/api/auth/me")
-async def get_current_user(authorization: Optional[str] = Header(None)):
+async def get_current_user(payload: dict = Depends(verify_token)):
     """Get current user info from token"""
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Missing authorization header")
-    
-    token = authorization
-    if token.startswith("Bearer "):
-        token = token[7:]
-    
-    try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
-        user = await users_collection.find_one({"_id": ObjectId(payload["sub"])})
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
-        
-        return {
-            "id": str(user["_id"]),
-            "email": user["email"],
-            "name": user["name"],
-            "role": user["role"]
-        }
-    except jwt.ExpiredSignatureError:
-        raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.InvalidTokenError:
-        raise HTTPException(status_code=401, detail="Invalid token")
+    user = await load_user(payload["sub"])
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+
+    return {
+        "id": str(user["_id"]),
+        "email": user["email"],
+        "name": user["name"],
+        "role": user["role"]
+    }
 
 # ==================== RESUME ROUTES ====================
 
 @app.post("/api/resumes/upload")
-async def upload_resume(file: UploadFile = File(...), authorization: Optional[str] = Header(None)):
-    """Upload and parse resume"""
-    try:
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-
-        with open(file_path, "wb") as f:
-            f.write(await file.read())
+async def upload_resume(file: UploadFile = File(...), payload: dict = Depends(verify_token)):
+    """Upload and parse resume.
 
-        # Parse resume content
-        if file.filename.lower().endswith(".pdf"):
-            content = parse_pdf(file_path)
-        elif file.filename.lower().endswith(".docx"):
-            content = parse_docx(file_path)
-        else:
+    In ``RESUME_INGEST_MODE=async`` the file is queued for parsing and the
+    response returns immediately with ``status: "processing"``; poll
+    ``/api/resumes/{id}/status`` for the outcome.
+    """
+    try:
+        if not is_supported_resume(file.filename):
             raise HTTPException(status_code=400, detail="Unsupported file type")
 
-        # Get user from token
-        if not authorization:
-            raise HTTPException(status_code=401, detail="Missing authorization header")
-        
-        token = authorization
-        if token.startswith("Bearer "):
-            token = token[7:]
-        
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload["sub"]
 
-        # Save to MongoDB
+        queue = None
+        if RESUME_INGEST_MODE == "async":
+            queue = ensure_ingest_workers()
+            if queue.full():
+                raise HTTPException(status_code=429, detail="Too many resumes being processed, try again shortly")
+
+        file_path, content_hash, size = await save_upload(file)
+
         resume_doc = {
             "user_id": ObjectId(user_id),
             "filename": file.filename,
-            "content": content,
+            "content_hash": content_hash,
+            "size": size,
+            "content": "",
+            "status": "processing",
             "created_at": datetime.utcnow()
         }
+
+        # Re-uploads of identical bytes reuse the earlier extraction
+        content = await find_parsed_content(content_hash)
+        if content is None and queue is None:
+            # Parse resume content in the parse pool
+            content = await parse_resume(file_path)
+        if content is not None:
+            resume_doc["content"] = content
+            resume_doc["status"] = "ready"
+            queue = None
+
+        # Save to MongoDB
         result = await resumes_collection.insert_one(resume_doc)
 
-        return {"filename": file.filename, "resume_id": str(result.inserted_id)}
+        if queue is not None:
+            try:
+                queue.put_nowait((result.inserted_id, file_path))
+            except asyncio.QueueFull:
+                await resumes_collection.delete_one({"_id": result.inserted_id})
+                raise HTTPException(status_code=429, detail="Too many resumes being processed, try again shortly")
+        else:
+            # compute the query vector and top-K matches once, off the request path
+            run_in_background(index_resume(result.inserted_id, resume_doc["content"]))
+
+        return {"filename": file.filename, "resume_id": str(result.inserted_id), "status": resume_doc["status"]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/resumes/upload/batch")
+async def upload_resumes_batch(files: List[UploadFile] = File(...), payload: dict = Depends(verify_token)):
+    """Upload several resumes in one request.
+
+    Files are saved and parsed concurrently (bounded by the parse pool),
+    stored with a single ``insert_many`` and reported per file, in order.
+    """
+    try:
+        user_id = payload["sub"]
+        if len(files) > UPLOAD_BATCH_MAX_FILES:
+            raise HTTPException(status_code=413, detail=f"At most {UPLOAD_BATCH_MAX_FILES} files per batch")
+
+        queue = None
+        if RESUME_INGEST_MODE == "async":
+            queue = ensure_ingest_workers()
+            if queue.maxsize - queue.qsize() < len(files):
+                raise HTTPException(status_code=429, detail="Too many resumes being processed, try again shortly")
+
+        async def prepare(file: UploadFile):
+            if not is_supported_resume(file.filename):
+                raise HTTPException(status_code=400, detail="Unsupported file type")
+            file_path, content_hash, size = await save_upload(file)
+            resume_doc = {
+                "user_id": ObjectId(user_id),
+                "filename": file.filename,
+                "content_hash": content_hash,
+                "size": size,
+                "content": "",
+                "status": "processing",
+                "created_at": datetime.utcnow()
+            }
+            content = await find_parsed_content(content_hash)
+            if content is None and queue is None:
+                content = await parse_resume(file_path)
+            if content is not None:
+                resume_doc["content"] = content
+                resume_doc["status"] = "ready"
+            return resume_doc, file_path
+
+        outcomes = await asyncio.gather(*[prepare(file) for file in files], return_exceptions=True)
+        prepared = [outcome for outcome in outcomes if not isinstance(outcome, BaseException)]
+        failed = await insert_many_reporting(resumes_collection, [doc for doc, _ in prepared])
 
+        results, position = [], 0
+        for file, outcome in zip(files, outcomes):
+            if isinstance(outcome, BaseException):
+                status_code = outcome.status_code if isinstance(outcome, HTTPException) else 500
+                detail = outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+                results.append({"filename": file.filename, "status": "failed", "status_code": status_code, "error": detail})
+                continue
+            resume_doc, file_path = outcome
+            if position in failed:
+                results.append({"filename": file.filename, "status": "failed", "status_code": 500, "error": failed[position]})
+            elif resume_doc["status"] == "processing":
+                try:
+                    queue.put_nowait((resume_doc["_id"], file_path))
+                except asyncio.QueueFull:
+                    await resumes_collection.update_one(
+                        {"_id": resume_doc["_id"]}, {"$set": {"status": "failed", "error": "Ingest queue full"}}
+                    )
+                    resume_doc["status"] = "failed"
+                results.append({"filename": file.filename, "resume_id": str(resume_doc["_id"]), "status": resume_doc["status"]})
+            else:
+                run_in_background(index_resume(resume_doc["_id"], resume_doc["content"]))
+                results.append({"filename": file.filename, "resume_id": str(resume_doc["_id"]), "status": "ready"})
+            position += 1
+
+        return {
+            "uploaded": sum(1 for r in results if "resume_id" in r),
+            "failed": sum(1 for r in results if "resume_id" not in r),
+            "results": results,
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/resumes")
-async def get_resumes(authorization: Optional[str] = Header(None)):
+async def get_resumes(payload: dict = Depends(verify_token), ndjson: bool = Depends(ndjson_requested)):
     """Get user's resumes"""
     try:
-        if not authorization:
-            raise HTTPException(status_code=401, detail="Missing authorization header")
-        
-        token = authorization
-        if token.startswith("Bearer "):
-            token = token[7:]
-        
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload["sub"]
         
-        find_result = await resumes_collection.find({"user_id": ObjectId(user_id)})
-        resumes = await find_result.to_list(None)
-        return [{"id": str(r["_id"]), "filename": r["filename"], "created_at": r.get("created_at")} for r in resumes]
+        cursor = resumes_collection.find(
+            {"user_id": ObjectId(user_id)}, {"filename": 1, "created_at": 1}
+        ).sort("created_at", -1)
+        serialize = lambda r: {"id": str(r["_id"]), "filename": r["filename"], "created_at": r.get("created_at")}
+        if ndjson:
+            return list_response((serialize(r) async for r in cursor), ndjson=True)
+        return list_response([serialize(r) for r in await cursor.to_list(None)])
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error getting resumes: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching resumes: {str(e)}")
 
-@app.post("/api/resumes/analyze/{resume_id}")
-async def analyze_resume(resume_id: str, authorization: Optional[str] = Header(None)):
-    """Analyze resume with OpenAI"""
+@app.get("/api/resumes/{resume_id}/status")
+async def get_resume_status(resume_id: str, payload: dict = Depends(verify_token)):
+    """Get the ingestion status of an uploaded resume"""
     try:
-        resume = await resumes_collection.find_one({"_id": ObjectId(resume_id)})
+        user_id = payload["sub"]
+
+        if not ObjectId.is_valid(resume_id):
+            raise HTTPException(status_code=404, detail="Resume not found")
+        # polled while parsing: leave the (compressed) text where it is
+        resume = await resumes_collection.find_one(
+            {"_id": ObjectId(resume_id), "user_id": ObjectId(user_id)}, {"filename": 1, "status": 1, "error": 1}
+        )
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
 
+        return {
+            "resume_id": resume_id,
+            "filename": resume.get("filename"),
+            "status": resume.get("status", "ready"),
+            "error": resume.get("error")
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def owned_ready_resume(resume_id: str, user_id: str) -> dict:
+    """The caller's parsed resume; 404 for someone else's, 409 while still processing"""
+    if not ObjectId.is_valid(resume_id):
+        raise HTTPException(status_code=404, detail="Resume not found")
+    resume = await resumes_collection.find_one({"_id": ObjectId(resume_id), "user_id": ObjectId(user_id)})
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    if resume.get("status", "ready") != "ready":
+        raise HTTPException(status_code=409, detail=f"Resume is {resume['status']}")
+    return resume
+
+@app.post("/api/resumes/analyze/{resume_id}")
+async def analyze_resume(resume_id: str, payload: dict = Depends(verify_token)):
+    """Analyze resume with OpenAI"""
+    try:
+        resume = await owned_ready_resume(resume_id, payload["sub"])
+
+        content = resume["content"]
+        content_hash = resume.get("content_hash") or text_hash(content)
+
+        cache_key = analysis_cache_key(content_hash)
+
+        result = await analysis_cache.get_or_compute(
+            cache_key, lambda: analyze_content(content, content_hash, cache_key)
+        )
+        return {"analysis": result["analysis"], "token_budget": result["token_budget"]}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def sse_event(data: dict, event: str = None) -> str:
+    message = f"data: {json.dumps(data)}\n\n"
+    return f"event: {event}\n{message}" if event else message
+
+async def stream_analysis(content: str, content_hash: str, cache_key: str):
+    """SSE stream of an analysis: ``delta`` chunks, then ``done`` with the token budget"""
+    try:
+        result = analysis_cache.get(cache_key)
+        if result is None and analysis_cache.inflight(cache_key) is not None:
+            result = await asyncio.shield(analysis_cache.inflight(cache_key))
+        if result is None:
+            result = await find_cached_analysis(cache_key)
+            if result is not None:
+                analysis_cache.set(cache_key, result)
+        if result is not None:
+            yield sse_event({"delta": result["analysis"]})
+            yield sse_event({"token_budget": result["token_budget"], "cached": True}, event="done")
+            return
+
+        yield sse_event({"status": "preparing"}, event="status")
+        text, token_budget = await prepare_analysis_input(content)
+        parts = []
+        async for delta in stream_chat_completion([
+            {"role": "system", "content": ANALYSIS_SYSTEM_PROMPT},
+            {"role": "user", "content": ANALYSIS_USER_PROMPT.format(content=text)}
+        ]):
+            parts.append(delta)
+            yield sse_event({"delta": delta})
+
+        result = {"analysis": "".join(parts), "token_budget": token_budget}
+        analysis_cache.set(cache_key, result)
+        await store_analysis(cache_key, content_hash, result, ANALYSIS_MODEL)
+        yield sse_event({"token_budget": token_budget, "cached": False}, event="done")
+    except HTTPException as e:
+        yield sse_event({"detail": e.detail}, event="error")
+    except Exception as e:
+        print(f"Streaming analysis error: {str(e)}")
+        yield sse_event({"detail": str(e)}, event="error")
+
+@app.get("/api/resumes/analyze/{resume_id}/stream")
+async def analyze_resume_stream(resume_id: str, payload: dict = Depends(verify_token)):
+    """Analyze resume with OpenAI, streaming tokens as Server-Sent Events.
+
+    Authenticated like every other route, so read it with ``fetch()`` and
+    a stream reader (``EventSource`` cannot send an Authorization header).
+    """
+    try:
+        resume = await owned_ready_resume(resume_id, payload["sub"])
+
         content = resume["content"]
+        content_hash = resume.get("content_hash") or text_hash(content)
+        cache_key = analysis_cache_key(content_hash)
 
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are an expert resume analyzer."},
-                {"role": "user", "content": f"Analyze this resume and provide a summary:\n{content}"}
-            ],
-            temperature=0.5
+        return StreamingResponse(
+            stream_analysis(content, content_hash, cache_key),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
         )
-        analysis = response.choices[0].message.content
-        return {"analysis": analysis}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/resumes/{resume_id}/matches")
+async def get_resume_matches(resume_id: str, k: int = 10, payload: dict = Depends(verify_token)):
+    """Top-k semantically closest jobs for one of the caller's resumes"""
+    try:
+        resume = await owned_ready_resume(resume_id, payload["sub"])
 
+        matches = await semantic_index.matches(resume_id, resume["content"], max(1, min(k, 100)))
+        jobs = await asyncio.gather(*[jobs_collection.find_one({"_id": ObjectId(job_id)}) for job_id, _ in matches])
+        return [
+            {**serialize_job(job), "match_score": score}
+            for job, (_, score) in zip(jobs, matches) if job is not None
+        ]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/storage/stats")
+async def get_storage_stats():
+    """Per-collection memory (or server) footprint of the active storage backend"""
+    return {"backend": storage.name, "collections": await storage.stats()}
+
+@app.get("/api/resumes/dedup/stats")
+async def get_dedup_stats():
+    """Content-hash deduplication and analysis cache hit/miss counters"""
+    return {**dedup_stats, "analysis_cache": analysis_cache.stats}
+
 # ==================== JOB ROUTES ====================
 
 @app.get("/api/jobs")
-async def get_jobs(authorization: Optional[str] = Header(None)):
-    """Get all jobs"""
+async def get_jobs(
+    q: Optional[str] = None,
+    location: Optional[str] = None,
+    company: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = JOBS_PAGE_SIZE,
+    authorization: Optional[str] = Header(None),
+    ndjson: bool = Depends(ndjson_requested),
+):
+    """Search jobs, one page at a time.
+
+    Results are ranked by match score when the caller has a parsed resume,
+    newest first otherwise.  When more results exist the opaque cursor for
+    the next page is returned in the ``X-Next-Cursor`` header.  NDJSON
+    responses (``?format=ndjson``) stream and allow much larger pages.
+    """
     try:
-        jobs_collection = InMemoryCollection()
-        jobs = await jobs_collection.find({}).to_list(None)
-        return [{"id": str(j["_id"]), "title": j.get("title"), "company": j.get("company"), "description": j.get("description")} for j in jobs]
+        limit = max(1, min(limit, JOBS_MAX_NDJSON_PAGE_SIZE if ndjson else JOBS_MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else {}
+
+        await job_search_index.ensure_built()
+        ids = job_search_index.search(q, company=company, location=location)
+        resume = await caller_resume(authorization)
+
+        scores = {}
+        if resume is not None:
+            position = (after.get("s", 0.0), after.get("id", "")) if after else None
+            ranked = await job_matcher.ranked_page(str(resume["_id"]), resume["content"], ids, position, limit + 1)
+            scores = dict(ranked)
+            page_ids = [job_id for job_id, _ in ranked]
+        else:
+            page_ids = page_newest_first(job_search_index.ordered_ids, ids, after.get("id"), limit)
+
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+        jobs = await asyncio.gather(*[jobs_collection.find_one({"_id": ObjectId(i)}) for i in page_ids])
+        results = [serialize_job(j, summary=True) for j in jobs if j is not None]
+        if resume is not None:
+            for job in results:
+                job["match_score"] = scores.get(job["id"])
+        headers = {}
+        if has_more and page_ids:
+            last = page_ids[-1]
+            headers["X-Next-Cursor"] = encode_cursor(
+                {"s": scores[last], "id": last} if resume is not None else {"id": last}
+            )
+        return list_response(results, ndjson=ndjson, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
+        print(f"Error getting jobs: {str(e)}")
         return []
 
+@app.get("/api/jobs/employer/my-jobs")
+async def get_my_jobs(payload: dict = Depends(verify_token), ndjson: bool = Depends(ndjson_requested)):
+    """Get jobs posted by the current employer"""
+    try:
+        user_id = payload["sub"]
+        
+        cursor = jobs_collection.find({"employer_id": ObjectId(user_id)}).sort("created_at", -1)
+        if ndjson:
+            return list_response((serialize_job(j, summary=True) async for j in cursor), ndjson=True)
+        return list_response([serialize_job(j, summary=True) for j in await cursor.to_list(None)])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/jobs/matched")
+async def get_matched_jobs(limit: int = 20, payload: dict = Depends(verify_token)):
+    """Best-matching jobs for the caller's latest resume, from the cached top-K list"""
+    try:
+        user_id = payload["sub"]
+
+        resume = await latest_resume(user_id)
+        if resume is None:
+            return []
+        matches = await job_matcher.matches(str(resume["_id"]), resume["content"], max(1, min(limit, MATCH_TOP_K)))
+        jobs = await asyncio.gather(*[jobs_collection.find_one({"_id": ObjectId(job_id)}) for job_id, _ in matches])
+        results = []
+        for job, (_, score) in zip(jobs, matches):
+            if job is not None:
+                results.append({**serialize_job(job), "match_score": score})
+        return results
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/jobs/{job_id}")
 async def get_job(job_id: str, authorization: Optional[str] = Header(None)):
     """Get a specific job"""
     try:
-        jobs_collection = InMemoryCollection()
+        if not ObjectId.is_valid(job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
         job = await jobs_collection.find_one({"_id": ObjectId(job_id)})
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
-        return job
+        result = serialize_job(job)
+        resume = await caller_resume(authorization)
+        if resume is not None:
+            result["match_score"] = await job_matcher.match_score(str(resume["_id"]), resume["content"], job_id)
+        return result
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/jobs")
-async def create_job(job_data: dict, authorization: Optional[str] = Header(None)):
+async def create_job(job_data: dict, payload: dict = Depends(verify_token)):
     """Create a new job"""
     try:
-        if not authorization:
-            raise HTTPException(status_code=401, detail="Missing authorization header")
-        
-        token = authorization
-        if token.startswith("Bearer "):
-            token = token[7:]
-        
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload["sub"]
         
-        jobs_collection = InMemoryCollection()
         job_doc = {
-            **job_data,
+            **client_fields(job_data),
             "employer_id": ObjectId(user_id),
             "created_at": datetime.utcnow()
         }
-        result = await jobs_collection.insert_one(job_doc)
+        await jobs_collection.insert_one(job_doc)
+        await job_feed.add_jobs([job_doc])
         
-        return {"id": str(result.inserted_id), **job_doc}
+        return serialize_job(job_doc)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def read_body_capped(request: Request, max_bytes: int) -> bytes:
+    """Request body, rejected with 413 up front by Content-Length or as soon
+    as a streamed (e.g. chunked) body crosses ``max_bytes``"""
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=413, detail="Request body too large")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def parse_bulk_items(body: bytes, content_type: str):
+    """Items of a JSON array or NDJSON body as ``[(item, error)]``; bad NDJSON lines fail alone"""
+    text = body.decode("utf-8", errors="replace").strip()
+    if "ndjson" not in content_type and text.startswith("["):
+        try:
+            items = json.loads(text)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid JSON array")
+        parsed = [(item, None) for item in items]
+    else:
+        parsed = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                parsed.append((json.loads(line), None))
+            except ValueError:
+                parsed.append((None, "Invalid JSON"))
+    return [
+        (item, None) if error is None and isinstance(item, dict) else (None, error or "Job must be a JSON object")
+        for item, error in parsed
+    ]
+
+@app.post("/api/jobs/bulk")
+async def create_jobs_bulk(request: Request, payload: dict = Depends(verify_token)):
+    """Create many jobs from a JSON array or NDJSON body (one job per line).
+
+    Jobs are stored with one ``insert_many`` and indexed in one pass; the
+    response carries a result per item, in order.
+    """
+    try:
+        user_id = payload["sub"]
+        body = await read_body_capped(request, JOBS_BULK_MAX_BYTES)
+        items = parse_bulk_items(body, request.headers.get("content-type", ""))
+        if len(items) > JOBS_BULK_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {JOBS_BULK_MAX_ITEMS} jobs per request")
+
+        created_at = datetime.utcnow()
+        job_docs = [
+            {**client_fields(item), "employer_id": ObjectId(user_id), "created_at": created_at}
+            for item, error in items if error is None
+        ]
+        failed = await insert_many_reporting(jobs_collection, job_docs)
+        inserted = [job for position, job in enumerate(job_docs) if position not in failed]
+        await job_feed.add_jobs(inserted)
+
+        results, position = [], 0
+        for index, (item, error) in enumerate(items):
+            if error is None:
+                error = failed.get(position)
+                job = job_docs[position]
+                position += 1
+            if error is None:
+                results.append({"index": index, "id": str(job["_id"])})
+            else:
+                results.append({"index": index, "error": error})
+
+        return {"inserted": len(inserted), "failed": len(items) - len(inserted), "results": results}
     except HTTPException:
         raise
     except Exception as e:
@@ -388,44 +3450,31 @@ async def create_job(job_data: dict, authorization: Optional[str] = Header(None)
 # ==================== APPLICATION ROUTES ====================
 
 @app.get("/api/applications")
-async def get_applications(authorization: Optional[str] = Header(None)):
+async def get_applications(payload: dict = Depends(verify_token), ndjson: bool = Depends(ndjson_requested)):
     """Get user's job applications"""
     try:
-        if not authorization:
-            raise HTTPException(status_code=401, detail="Missing authorization header")
-        
-        token = authorization
-        if token.startswith("Bearer "):
-            token = token[7:]
-        
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload["sub"]
         
-        applications_collection = InMemoryCollection()
-        apps = await applications_collection.find({"user_id": ObjectId(user_id)}).to_list(None)
-        return [{"id": str(a["_id"]), "job_id": str(a.get("job_id")), "status": a.get("status")} for a in apps]
+        cursor = applications_collection.find({"user_id": ObjectId(user_id)}, {"job_id": 1, "status": 1})
+        serialize = lambda a: {"id": str(a["_id"]), "job_id": str(a.get("job_id")), "status": a.get("status")}
+        if ndjson:
+            return list_response((serialize(a) async for a in cursor), ndjson=True)
+        return list_response([serialize(a) for a in await cursor.to_list(None)])
     except HTTPException:
         raise
     except Exception as e:
         return []
 
 @app.post("/api/applications")
-async def create_application(app_data: dict, authorization: Optional[str] = Header(None)):
+async def create_application(app_data: dict, payload: dict = Depends(verify_token)):
     """Create a job application"""
     try:
-        if not authorization:
-            raise HTTPException(status_code=401, detail="Missing authorization header")
-        
-        token = authorization
-        if token.startswith("Bearer "):
-            token = token[7:]
-        
-        payload = jwt.decode(token, JWT_SECRET, algorithms=["HS256"])
         user_id = payload["sub"]
         
-        applications_collection = InMemoryCollection()
+        job_id = app_data.get("job_id")
         app_doc = {
-            **app_data,
+            **client_fields(app_data),
+            "job_id": ObjectId(job_id) if ObjectId.is_valid(job_id) else job_id,
             "user_id": ObjectId(user_id),
             "status": "pending",
             "created_at": datetime.utcnow()
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""Local load benchmark for the Resume AI backend.
+
+Drives the ASGI app in-process through httpx's ASGITransport (no network,
+no remote preview URL) with concurrent scenarios, reports p50/p95/p99
+latency and throughput per scenario, and saves the run as JSON under
+test_reports/benchmarks/ so it can be compared with the previous run.
+
+    python backend_benchmark.py                      # default sizes
+    python backend_benchmark.py --quick              # smoke-sized run
+    python backend_benchmark.py --jobs 1000000 --scenarios jobs
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPORT_DIR = os.path.join(ROOT, "test_reports", "benchmarks")
+SCENARIOS = ["auth", "upload", "jobs", "analysis"]
+
+SKILLS = (
+    "python java go rust typescript react node fastapi django flask kubernetes docker terraform aws gcp azure "
+    "postgres mongodb redis kafka spark airflow pandas numpy pytorch tensorflow ml nlp llm graphql rest grpc "
+    "ci cd testing security linux networking frontend backend fullstack mobile ios android data analytics"
+).split()
+TITLES = ["Engineer", "Senior Engineer", "Staff Engineer", "Developer", "Data Scientist", "Architect", "Lead"]
+LOCATIONS = ["Remote", "Berlin", "London", "New York", "Bangalore", "Toronto", "Sydney"]
+COMPANIES = [f"Company {i}" for i in range(200)]
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def summarize(latencies, statuses, elapsed):
+    values = sorted(latencies)
+    errors = sum(1 for status in statuses if status >= 400)
+    counts = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    return {
+        "requests": len(values),
+        "errors": errors,
+        "status_counts": counts,
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(values) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(values[-1] * 1000, 2) if values else 0.0,
+    }
+
+def resume_text(rng, words=350):
+    skills = " ".join(rng.choice(SKILLS) for _ in range(words))
+    return f"Candidate {rng.randrange(10 ** 9)} {rng.choice(TITLES)}. Experience: {skills}"
+
+def make_docx(text):
+    import docx
+    document = docx.Document()
+    for start in range(0, len(text), 400):
+        document.add_paragraph(text[start:start + 400])
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+def make_pdf(text):
+    """Minimal single-page PDF with the text as Helvetica lines"""
+    text = text.replace("\\", "").replace("(", "").replace(")", "")
+    lines = [text[i:i + 90] for i in range(0, min(len(text), 90 * 50), 90)]
+    body = " ".join(f"({line}) Tj T*" for line in lines)
+    stream = f"BT /F1 10 Tf 12 TL 40 760 Td {body} ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    out, offsets = b"%PDF-1.4\n", []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF" % (len(objects) + 1, xref)
+    return out
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+class BackendBenchmark:
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.results = {}
+        self.index = None
+        self.client = None
+        self.llm_calls = 0
+
+    # ---------- harness ----------
+
+    def load_app(self):
+        """Import the app with an isolated, volatile configuration"""
+        os.environ.setdefault("STORAGE_BACKEND", "memory")
+        os.environ["STORAGE_DATA_DIR"] = ""
+        os.environ["ANALYSIS_CACHE_PATH"] = ""
+        os.environ.setdefault("BCRYPT_ROUNDS", str(self.args.bcrypt_rounds))
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        sys.path.insert(0, ROOT)
+        from api import index
+        self.index = index
+
+    def install_fake_openai(self):
+        """Point the shared OpenAI client at an in-process fake with fixed latency"""
+        import httpx
+        import openai
+
+        latency = self.args.llm_latency_ms / 1000
+
+        async def handler(request):
+            body = json.loads(request.content)
+            self.llm_calls += 1
+            await asyncio.sleep(latency)
+            prompt = body["messages"][-1]["content"]
+            return httpx.Response(200, json={
+                "id": "bench", "object": "chat.completion", "created": 0, "model": body["model"],
+                "choices": [{
+                    "index": 0, "finish_reason": "stop",
+                    "message": {"role": "assistant", "content": f"Summary of a {len(prompt)} character resume."},
+                }],
+            })
+
+        self.index._openai_client = openai.AsyncOpenAI(
+            api_key="benchmark", base_url="http://fake-openai/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+
+    async def run_load(self, name, requests, concurrency=None):
+        """Run zero-argument request coroutines ``concurrency`` at a time and record the scenario"""
+        semaphore = asyncio.Semaphore(concurrency or self.args.concurrency)
+        latencies, statuses = [], []
+
+        async def one(make_request):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await make_request()
+                    status = response.status_code
+                except Exception as e:
+                    print(f"    request error: {e}")
+                    status = 599
+                latencies.append(time.perf_counter() - started)
+                statuses.append(status)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[one(make_request) for make_request in requests])
+        result = summarize(latencies, statuses, time.perf_counter() - started)
+        self.results[name] = result
+        flag = "✅" if not result["errors"] else "⚠️ "
+        print(
+            f"{flag} {name:<28} n={result['requests']:<6} {result['throughput_rps']:>9.1f} req/s  "
+            f"p50 {result['p50_ms']:>8.2f}  p95 {result['p95_ms']:>8.2f}  p99 {result['p99_ms']:>8.2f} ms"
+            + (f"  errors={result['errors']}" if result["errors"] else "")
+        )
+        return result
+
+    async def signup(self, email, role="job_seeker"):
+        response = await self.client.post(
+            "/api/auth/signup", json={"email": email, "password": "benchmark-pw", "name": email, "role": role}
+        )
+        return response.json()["token"]
+
+    # ---------- scenarios ----------
+
+    async def scenario_auth(self):
+        print("\n🔐 Signup / login storm")
+        users = [f"storm-{i}@bench.local" for i in range(self.args.users)]
+        await self.run_load("auth.signup", [
+            (lambda email=email: self.client.post(
+                "/api/auth/signup", json={"email": email, "password": "benchmark-pw", "name": email}
+            )) for email in users
+        ])
+        await self.run_load("auth.login", [
+            (lambda email=email: self.client.post(
+                "/api/auth/login", json={"email": email, "password": "benchmark-pw"}
+            )) for email in users
+        ])
+        token = await self.signup("me@bench.local")
+        headers = {"Authorization": f"Bearer {token}"}
+        await self.run_load("auth.me", [
+            (lambda: self.client.get("/api/auth/me", headers=headers)) for _ in range(self.args.users * 5)
+        ])
+
+    async def scenario_upload(self):
+        print("\n📄 Upload burst (generated PDF + DOCX)")
+        token = await self.signup("uploader@bench.local")
+        headers = {"Authorization": f"Bearer {token}"}
+        files = []
+        for i in range(self.args.uploads):
+            text = resume_text(self.rng)
+            if i % 2:
+                files.append((f"resume-{i}.docx", make_docx(text)))
+            else:
+                files.append((f"resume-{i}.pdf", make_pdf(text)))
+        await self.run_load("upload.single", [
+            (lambda name=name, data=data: self.client.post(
+                "/api/resumes/upload", files={"file": (name, data)}, headers=headers
+            )) for name, data in files
+        ])
+        batches = [files[i:i + 10] for i in range(0, len(files), 10)]
+        # re-uploads of the same bytes exercise content-hash deduplication
+        await self.run_load("upload.batch10_duplicate", [
+            (lambda batch=batch: self.client.post(
+                "/api/resumes/upload/batch", files=[("files", item) for item in batch], headers=headers
+            )) for batch in batches
+        ], concurrency=max(1, self.args.concurrency // 10))
+
+    async def scenario_jobs(self):
+        print(f"\n💼 Job listing at {self.args.jobs:,} jobs")
+        token = await self.signup("employer@bench.local", role="employer")
+        employer = {"Authorization": f"Bearer {token}"}
+        chunk = self.index.JOBS_BULK_MAX_ITEMS
+        payloads = []
+        for start in range(0, self.args.jobs, chunk):
+            lines = []
+            for _ in range(start, min(start + chunk, self.args.jobs)):
+                skills = " ".join(self.rng.choice(SKILLS) for _ in range(40))
+                lines.append(json.dumps({
+                    "title": f"{self.rng.choice(SKILLS).title()} {self.rng.choice(TITLES)}",
+                    "company": self.rng.choice(COMPANIES),
+                    "location": self.rng.choice(LOCATIONS),
+                    "description": f"We are hiring. Requirements: {skills}",
+                }))
+            payloads.append("\n".join(lines))
+        await self.run_load("jobs.bulk_seed", [
+            (lambda body=body: self.client.post(
+                "/api/jobs/bulk", content=body,
+                headers={**employer, "Content-Type": "application/x-ndjson"},
+            )) for body in payloads
+        ], concurrency=4)
+
+        seeker_token = await self.signup("seeker@bench.local")
+        seeker = {"Authorization": f"Bearer {seeker_token}"}
+        await self.client.post(
+            "/api/resumes/upload", files={"file": ("seeker.docx", make_docx(resume_text(self.rng)))}, headers=seeker
+        )
+        # first requests build the search and match indexes
+        started = time.perf_counter()
+        await self.client.get("/api/jobs", params={"q": "python"}, headers=seeker)
+        self.results["jobs.index_build"] = {"duration_s": round(time.perf_counter() - started, 3)}
+        print(f"    index build {self.results['jobs.index_build']['duration_s']:.3f} s")
+
+        queries = self.args.job_queries
+        await self.run_load("jobs.first_page", [
+            (lambda: self.client.get("/api/jobs", params={"limit": 50})) for _ in range(queries)
+        ])
+        await self.run_load("jobs.search", [
+            (lambda term=self.rng.choice(SKILLS), location=self.rng.choice(LOCATIONS): self.client.get(
+                "/api/jobs", params={"q": term, "location": location, "limit": 50}
+            )) for _ in range(queries)
+        ])
+        await self.run_load("jobs.first_page_scored", [
+            (lambda: self.client.get("/api/jobs", params={"limit": 50}, headers=seeker)) for _ in range(queries)
+        ])
+        await self.run_load("jobs.matched", [
+            (lambda: self.client.get("/api/jobs/matched", params={"limit": 20}, headers=seeker))
+            for _ in range(queries)
+        ])
+
+        async def walk_pages(pages=10):
+            response, cursor = None, None
+            for _ in range(pages):
+                params = {"q": "engineer", "limit": 50}
+                if cursor:
+                    params["cursor"] = cursor
+                response = await self.client.get("/api/jobs", params=params)
+                cursor = response.headers.get("x-next-cursor")
+                if not cursor:
+                    break
+            return response
+        await self.run_load("jobs.cursor_walk_10_pages", [walk_pages for _ in range(max(1, queries // 10))])
+
+    async def scenario_analysis(self):
+        print(f"\n🤖 Analysis against a fake OpenAI ({self.args.llm_latency_ms} ms per call)")
+        token = await self.signup("analyst@bench.local")
+        headers = {"Authorization": f"Bearer {token}"}
+        resume_ids = []
+        for i in range(self.args.analyses):
+            response = await self.client.post(
+                "/api/resumes/upload",
+                files={"file": (f"analysis-{i}.docx", make_docx(resume_text(self.rng, words=600)))},
+                headers=headers,
+            )
+            resume_ids.append(response.json()["resume_id"])
+        calls_before = self.llm_calls
+        await self.run_load("analysis.cold", [
+            (lambda resume_id=resume_id: self.client.post(f"/api/resumes/analyze/{resume_id}", headers=headers))
+            for resume_id in resume_ids
+        ])
+        await self.run_load("analysis.cached", [
+            (lambda resume_id=resume_id: self.client.post(f"/api/resumes/analyze/{resume_id}", headers=headers))
+            for resume_id in resume_ids * 5
+        ])
+        self.results["analysis.llm_calls"] = {"calls": self.llm_calls - calls_before}
+        print(f"    fake OpenAI calls: {self.llm_calls - calls_before}")
+
+    # ---------- reporting ----------
+
+    def previous_report(self):
+        if not os.path.isdir(REPORT_DIR):
+            return None
+        reports = sorted(name for name in os.listdir(REPORT_DIR) if name.startswith("benchmark_") and name.endswith(".json"))
+        if not reports:
+            return None
+        with open(os.path.join(REPORT_DIR, reports[-1])) as f:
+            return json.load(f)
+
+    def compare(self, previous):
+        print(f"\n📈 Compared with {previous.get('timestamp')} ({previous.get('git_commit')})")
+        for name, result in self.results.items():
+            before = previous.get("scenarios", {}).get(name)
+            if not before or "p95_ms" not in result or "p95_ms" not in before:
+                continue
+            p95_change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            rps_change = (
+                (result["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+                if before["throughput_rps"] else 0
+            )
+            flag = "⚠️ " if p95_change > 20 or rps_change < -20 else "  "
+            print(f"{flag} {name:<28} p95 {p95_change:+7.1f}%   throughput {rps_change:+7.1f}%")
+
+    def save(self):
+        previous = self.previous_report()
+        report = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": sys.version.split()[0],
+            "config": {key: value for key, value in vars(self.args).items() if key != "output"},
+            "scenarios": self.results,
+        }
+        output = self.args.output or os.path.join(
+            REPORT_DIR, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        if previous:
+            self.compare(previous)
+        print(f"\n💾 Saved {output}")
+
+    async def run(self):
+        self.load_app()
+        app = self.index.app
+        import httpx
+
+        print("🚀 Resume AI backend benchmark (in-process ASGI)")
+        print(f"📍 concurrency={self.args.concurrency} bcrypt_rounds={self.index.BCRYPT_ROUNDS}")
+        print("=" * 60)
+        await app.router.startup()
+        self.install_fake_openai()
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=None
+            ) as client:
+                self.client = client
+                for scenario in self.args.scenarios:
+                    await getattr(self, f"scenario_{scenario}")()
+        finally:
+            await app.router.shutdown()
+        self.save()
+        return 1 if any(result.get("errors") for result in self.results.values()) else 0
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma-separated subset of {SCENARIOS}")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200, help="accounts in the signup/login storm")
+    parser.add_argument("--uploads", type=int, default=100, help="generated resumes in the upload burst")
+    parser.add_argument("--jobs", type=int, default=10000, help="jobs to seed (10k-1M)")
+    parser.add_argument("--job-queries", type=int, default=500)
+    parser.add_argument("--analyses", type=int, default=50)
+    parser.add_argument("--llm-latency-ms", type=float, default=200)
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--quick", action="store_true", help="tiny sizes for a smoke run")
+    parser.add_argument("--output", default=None, help="report path (default test_reports/benchmarks/)")
+    args = parser.parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    if args.quick:
+        args.users, args.uploads, args.jobs, args.job_queries, args.analyses = 20, 10, 2000, 50, 5
+        args.llm_latency_ms, args.bcrypt_rounds = 20, 4
+    return args
+
+def main():
+    args = parse_args()
+    # uploads are written relative to the working directory; keep them out of the repo
+    os.chdir(tempfile.mkdtemp(prefix="resume-ai-bench-"))
+    return asyncio.run(BackendBenchmark(args).run())
+
+if __name__ == "__main__":
+    sys.exit(main())
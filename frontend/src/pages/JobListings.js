@@ -9,38 +9,31 @@ import { Briefcase, LogOut, Loader2, Search } from 'lucide-react';
 
 const JobListings = ({ user, onLogout }) => {
   const [jobs, setJobs] = useState([]);
-  const [filteredJobs, setFilteredJobs] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchQuery, setSearchQuery] = useState('');
 
   useEffect(() => {
-    fetchJobs();
-  }, []);
+    // Search runs server-side; wait for typing to pause before querying
+    const timer = setTimeout(() => fetchJobs(searchQuery), 250);
+    return () => clearTimeout(timer);
+  }, [searchQuery]);
 
-  useEffect(() => {
-    if (searchQuery) {
-      const filtered = jobs.filter(job => 
-        job.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        job.company.toLowerCase().includes(searchQuery.toLowerCase()) ||
-        job.location.toLowerCase().includes(searchQuery.toLowerCase())
-      );
-      setFilteredJobs(filtered);
-    } else {
-      setFilteredJobs(jobs);
-    }
-  }, [searchQuery, jobs]);
-
-  const fetchJobs = async () => {
+  const fetchJobs = async (query, cursor = null) => {
     try {
       const token = localStorage.getItem('token');
-      const response = await fetch(`${API}/jobs`, {
+      const params = new URLSearchParams();
+      if (query) params.set('q', query);
+      if (cursor) params.set('cursor', cursor);
+      const response = await fetch(`${API}/jobs?${params}`, {
         headers: { Authorization: `Bearer ${token}` }
       });
 
       if (response.ok) {
         const data = await response.json();
-        setJobs(data);
-        setFilteredJobs(data);
+        setJobs(prev => (cursor ? [...prev, ...data] : data));
+        setNextCursor(response.headers.get('X-Next-Cursor'));
       }
     } catch (error) {
       toast.error('Error loading jobs');
@@ -49,6 +42,12 @@ const JobListings = ({ user, onLogout }) => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    await fetchJobs(searchQuery, nextCursor);
+    setLoadingMore(false);
+  };
+
   if (loading) {
     return (
       <div className="min-h-screen flex items-center justify-center">
@@ -100,13 +99,13 @@ const JobListings = ({ user, onLogout }) => {
         </div>
 
         {/* Job Listings */}
-        {filteredJobs.length === 0 ? (
+        {jobs.length === 0 ? (
           <Card data-testid="no-jobs-message" className="p-8 bg-white rounded-2xl border border-slate-100 text-center">
             <p className="text-slate-600">No jobs found</p>
           </Card>
         ) : (
           <div data-testid="jobs-grid" className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6">
-            {filteredJobs.map((job) => (
+            {jobs.map((job) => (
               <Link key={job.id} to={`/jobs/${job.id}`}>
                 <Card data-testid={`job-card-${job.id}`} className="p-6 bg-white rounded-2xl border border-slate-100 shadow-sm hover:shadow-md cursor-pointer hover:-translate-y-1 transition-all duration-300">
                   <div className="flex items-start justify-between mb-4">
@@ -127,6 +126,14 @@ const JobListings = ({ user, onLogout }) => {
             ))}
           </div>
         )}
+
+        {nextCursor && (
+          <div className="mt-8 flex justify-center">
+            <Button data-testid="load-more-btn" onClick={loadMore} disabled={loadingMore} variant="outline" className="rounded-full">
+              {loadingMore ? <Loader2 className="w-4 h-4 animate-spin" /> : 'Load more'}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
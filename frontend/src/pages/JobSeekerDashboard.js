@@ -24,7 +24,7 @@ const JobSeekerDashboard = ({ user, onLogout }) => {
 
       const [resumesRes, jobsRes, appsRes] = await Promise.all([
         fetch(`${API}/resumes`, { headers }),
-        fetch(`${API}/jobs`, { headers }),
+        fetch(`${API}/jobs/matched`, { headers }),
         fetch(`${API}/applications`, { headers })
       ]);
 
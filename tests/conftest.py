@@ -0,0 +1,6 @@
+import os
+
+# Volatile in-memory storage and cheap hashes for the test process
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ["STORAGE_DATA_DIR"] = ""
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
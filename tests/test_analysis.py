@@ -0,0 +1,106 @@
+import asyncio
+
+from api import index
+
+
+def fake_completions(monkeypatch, summary="Python engineer, 5 years."):
+    calls = []
+
+    async def chat_completion(messages, model=None, temperature=0.5):
+        calls.append(messages[-1]["content"])
+        return summary
+
+    monkeypatch.setattr(index, "chat_completion", chat_completion)
+    return calls
+
+
+def test_short_resume_is_sent_directly(monkeypatch):
+    calls = fake_completions(monkeypatch)
+    text, budget = asyncio.run(index.prepare_analysis_input("Jane Doe\nPython engineer"))
+    assert calls == []
+    assert budget["strategy"] == "direct" and budget["dropped_tokens"] == 0
+    assert "Python engineer" in text
+
+
+def test_map_step_is_capped_at_max_chunks(monkeypatch):
+    monkeypatch.setattr(index, "ANALYSIS_MAX_INPUT_TOKENS", 200)
+    monkeypatch.setattr(index, "ANALYSIS_CHUNK_TOKENS", 100)
+    monkeypatch.setattr(index, "ANALYSIS_MAX_CHUNKS", 4)
+    calls = fake_completions(monkeypatch)
+    content = "\n".join(f"Line {i}: built services in python and go at company {i}" for i in range(5000))
+
+    text, budget = asyncio.run(index.prepare_analysis_input(content))
+
+    assert len(calls) == 4
+    assert budget["summary_calls"] == budget["chunks"] == 4
+    assert budget["max_chunks"] == 4
+    assert budget["dropped_tokens"] >= budget["normalized_tokens"] - 4 * 100
+    assert budget["strategy"] == "map_reduce"
+    # the kept chunks come from the start of the resume
+    assert "Line 0:" in calls[0]
+    assert budget["prompt_tokens"] <= 200
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = index.AnalysisCache(max_entries=2)
+    cache.set("a", {"analysis": "A"})
+    cache.set("b", {"analysis": "B"})
+    assert cache.get("a") == {"analysis": "A"}
+    cache.set("c", {"analysis": "C"})
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.stats["evictions"] == 1
+
+
+def test_cache_entries_expire(monkeypatch, tmp_path):
+    now = [1000.0]
+    monkeypatch.setattr(index.time, "time", lambda: now[0])
+    path = str(tmp_path / "analyses.db")
+    cache = index.AnalysisCache(ttl_seconds=60, path=path)
+    cache.set("a", {"analysis": "A"})
+    now[0] += 59
+    assert cache.get("a") == {"analysis": "A"}
+    # persisted entries survive a restart until they expire
+    assert index.AnalysisCache(ttl_seconds=60, path=path).get("a") == {"analysis": "A"}
+    now[0] += 2
+    assert cache.get("a") is None
+    assert index.AnalysisCache(ttl_seconds=60, path=path).get("a") is None
+
+
+def test_concurrent_requests_share_one_call():
+    cache = index.AnalysisCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"analysis": "A"}
+
+    async def scenario():
+        results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(5)))
+        return results + [await cache.get_or_compute("k", compute)]
+
+    results = asyncio.run(scenario())
+    assert calls == [1]
+    assert all(result == {"analysis": "A"} for result in results)
+    assert cache.stats["coalesced"] == 4 and cache.stats["hits"] == 1
+
+
+def test_stored_analyses_expire():
+    result = {"analysis": "A", "token_budget": {"strategy": "direct"}}
+    key = "stored-analyses-expire"
+
+    async def scenario():
+        await index.store_analysis(key, "hash", result, "model")
+        fresh = await index.find_cached_analysis(key)
+        # an expired row is ignored and replaced by the next analysis
+        await index.analyses_collection.update_one(
+            {"cache_key": key}, {"$set": {"expires_at": index.datetime.utcnow()}}
+        )
+        expired = await index.find_cached_analysis(key)
+        gone = await index.analyses_collection.find_one({"cache_key": key})
+        return fresh, expired, gone
+
+    fresh, expired, gone = asyncio.run(scenario())
+    assert fresh == result
+    assert expired is None and gone is None
@@ -0,0 +1,270 @@
+import asyncio
+import uuid
+
+from datetime import datetime
+
+from bson import ObjectId
+
+from api import index
+from tests.utils import client, signup
+
+JOB = {"title": "Backend Engineer", "company": "Acme", "description": "Python and MongoDB", "requirements": ["python"]}
+
+
+def test_create_job_ignores_client_id_and_owner():
+    async def scenario():
+        async with client() as http:
+            employer_id, headers = await signup(http, role="employer")
+            response = await http.post(
+                "/api/jobs", headers=headers,
+                json={**JOB, "_id": "zzz", "employer_id": "someone-else"},
+            )
+            assert response.status_code == 200, response.text
+            job = response.json()
+            assert ObjectId.is_valid(job["id"]) and job["id"] != "zzz"
+            assert job["employer_id"] == employer_id
+
+            listing = await http.get("/api/jobs")
+            assert listing.status_code == 200, listing.text
+            assert job["id"] in [item["id"] for item in listing.json()]
+
+    asyncio.run(scenario())
+
+
+def test_bulk_jobs_ignore_client_id():
+    async def scenario():
+        async with client() as http:
+            _, headers = await signup(http, role="employer")
+            response = await http.post(
+                "/api/jobs/bulk", headers=headers,
+                json=[{**JOB, "_id": "dup"}, {**JOB, "_id": "dup"}],
+            )
+            assert response.status_code == 200, response.text
+            assert response.json()["inserted"] == 2
+
+            listing = await http.get("/api/jobs")
+            assert listing.status_code == 200, listing.text
+
+    asyncio.run(scenario())
+
+
+def test_applications_ignore_client_id_and_owner():
+    async def scenario():
+        async with client() as http:
+            _, employer = await signup(http, role="employer")
+            job = (await http.post("/api/jobs", headers=employer, json=JOB)).json()
+            _, seeker = await signup(http)
+            ids = []
+            for _ in range(2):
+                response = await http.post(
+                    "/api/applications", headers=seeker,
+                    json={"job_id": job["id"], "_id": "fixed", "user_id": "someone-else"},
+                )
+                assert response.status_code == 200, response.text
+                ids.append(response.json()["id"])
+            assert "fixed" not in ids and ids[0] != ids[1]
+
+            # Listed under the caller, not the user_id from the payload
+            applications = (await http.get("/api/applications", headers=seeker)).json()
+            assert sorted(item["id"] for item in applications) == sorted(ids)
+
+    asyncio.run(scenario())
+
+
+def test_resume_analysis_requires_the_owner():
+    async def scenario():
+        async with client() as http:
+            owner_id, owner = await signup(http)
+            _, stranger = await signup(http)
+            content = "Jane Doe\nPython engineer"
+            content_hash = index.text_hash(content)
+            resume = {
+                "user_id": ObjectId(owner_id), "filename": "cv.docx", "content": content,
+                "content_hash": content_hash, "status": "ready", "created_at": datetime.utcnow(),
+            }
+            await index.resumes_collection.insert_one(resume)
+            # served from the cache, so no LLM call is made
+            cached = {"analysis": "Strong Python background", "token_budget": {"strategy": "direct"}}
+            index.analysis_cache.set(index.analysis_cache_key(content_hash), cached)
+
+            analyze = f"/api/resumes/analyze/{resume['_id']}"
+            stream = f"/api/resumes/analyze/{resume['_id']}/stream"
+            assert (await http.post(analyze)).status_code == 401
+            assert (await http.get(stream)).status_code == 401
+            assert (await http.post(analyze, headers=stranger)).status_code == 404
+            assert (await http.get(stream, headers=stranger)).status_code == 404
+            assert (await http.post("/api/resumes/analyze/not-an-id", headers=owner)).status_code == 404
+
+            response = await http.post(analyze, headers=owner)
+            assert response.status_code == 200 and response.json()["analysis"] == cached["analysis"]
+            response = await http.get(stream, headers=owner)
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            assert "Strong Python background" in response.text
+
+    asyncio.run(scenario())
+
+
+def test_bulk_body_is_capped(monkeypatch):
+    monkeypatch.setattr(index, "JOBS_BULK_MAX_BYTES", 1024)
+    line = b'{"title": "Backend Engineer", "description": "' + b"x" * 200 + b'"}\n'
+
+    async def chunked(lines):
+        for _ in range(lines):
+            yield line
+
+    async def scenario():
+        async with client() as http:
+            _, headers = await signup(http, role="employer")
+            ndjson = {**headers, "Content-Type": "application/x-ndjson"}
+
+            # rejected by Content-Length
+            response = await http.post("/api/jobs/bulk", headers=ndjson, content=line * 10)
+            assert response.status_code == 413
+            # no Content-Length: rejected once the streamed body crosses the cap
+            response = await http.post("/api/jobs/bulk", headers=ndjson, content=chunked(10))
+            assert response.status_code == 413
+
+            response = await http.post("/api/jobs/bulk", headers=ndjson, content=chunked(3))
+            assert response.status_code == 200, response.text
+            assert response.json()["inserted"] == 3
+
+    asyncio.run(scenario())
+
+
+def async_ingest(monkeypatch, tmp_path, parse, queue_size=100, workers=2):
+    """Queue uploads for a fake parser on fresh ingest workers"""
+    monkeypatch.setattr(index, "RESUME_INGEST_MODE", "async")
+    monkeypatch.setattr(index, "INGEST_QUEUE_SIZE", queue_size)
+    monkeypatch.setattr(index, "INGEST_WORKERS", workers)
+    monkeypatch.setattr(index, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(index, "_ingest_queue", None)
+    monkeypatch.setattr(index, "_ingest_tasks", [])
+    monkeypatch.setattr(index, "parse_resume", parse)
+
+
+def resume_file():
+    """A .docx upload with bytes no other test has uploaded"""
+    return {"file": ("cv.docx", f"resume {uuid.uuid4()}".encode())}
+
+
+async def wait_for_status(http, headers, resume_id, status):
+    for _ in range(100):
+        response = await http.get(f"/api/resumes/{resume_id}/status", headers=headers)
+        assert response.status_code == 200, response.text
+        if response.json()["status"] == status:
+            return response.json()
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"resume {resume_id} never became {status}: {response.json()}")
+
+
+def test_async_ingest_parses_in_the_background(monkeypatch, tmp_path):
+    parsed = asyncio.Event()
+
+    async def parse(file_path):
+        await parsed.wait()
+        return "Jane Doe\nPython engineer"
+    async_ingest(monkeypatch, tmp_path, parse)
+
+    async def scenario():
+        async with client() as http:
+            _, headers = await signup(http)
+            response = await http.post("/api/resumes/upload", headers=headers, files=resume_file())
+            assert response.status_code == 200, response.text
+            assert response.json()["status"] == "processing"
+            resume_id = response.json()["resume_id"]
+            await wait_for_status(http, headers, resume_id, "processing")
+            parsed.set()
+            status = await wait_for_status(http, headers, resume_id, "ready")
+            assert status["error"] is None
+            resume = await index.resumes_collection.find_one({"_id": ObjectId(resume_id)})
+            assert resume["content"] == "Jane Doe\nPython engineer"
+
+    asyncio.run(scenario())
+
+
+def test_async_ingest_records_parse_failures(monkeypatch, tmp_path):
+    async def parse(file_path):
+        raise index.HTTPException(status_code=422, detail="Resume could not be parsed")
+    async_ingest(monkeypatch, tmp_path, parse)
+
+    async def scenario():
+        async with client() as http:
+            _, headers = await signup(http)
+            response = await http.post("/api/resumes/upload", headers=headers, files=resume_file())
+            assert response.status_code == 200, response.text
+            status = await wait_for_status(http, headers, response.json()["resume_id"], "failed")
+            assert status["error"] == "Resume could not be parsed"
+
+    asyncio.run(scenario())
+
+
+def test_async_ingest_rejects_uploads_when_the_queue_is_full(monkeypatch, tmp_path):
+    release = asyncio.Event()
+
+    async def parse(file_path):
+        await release.wait()
+        return "Jane Doe"
+    async_ingest(monkeypatch, tmp_path, parse, queue_size=1, workers=1)
+
+    async def scenario():
+        async with client() as http:
+            _, headers = await signup(http)
+            # the worker takes the first upload, the second fills the queue
+            for _ in range(2):
+                response = await http.post("/api/resumes/upload", headers=headers, files=resume_file())
+                assert response.status_code == 200, response.text
+                await asyncio.sleep(0.01)
+            response = await http.post("/api/resumes/upload", headers=headers, files=resume_file())
+            assert response.status_code == 429
+            release.set()
+            await index._ingest_queue.join()
+
+    asyncio.run(scenario())
+
+
+def test_resumes_left_processing_are_recovered(monkeypatch, tmp_path):
+    async def parse(file_path):
+        return "Recovered"
+    async_ingest(monkeypatch, tmp_path, parse)
+
+    async def scenario():
+        async with client() as http:
+            user_id, headers = await signup(http)
+            kept, lost = uuid.uuid4().hex, uuid.uuid4().hex
+            (tmp_path / f"{kept}.pdf").write_bytes(b"%PDF")
+            ids = []
+            for content_hash in (kept, lost):
+                result = await index.resumes_collection.insert_one({
+                    "user_id": ObjectId(user_id), "filename": "cv.pdf", "content_hash": content_hash,
+                    "content": "", "status": "processing", "created_at": datetime.utcnow(),
+                })
+                ids.append(str(result.inserted_id))
+
+            await index.requeue_stale_ingests()
+            await index._ingest_queue.join()
+            assert (await wait_for_status(http, headers, ids[0], "ready"))["error"] is None
+            failed = await wait_for_status(http, headers, ids[1], "failed")
+            assert failed["error"] == "Upload lost before it was processed"
+
+    asyncio.run(scenario())
+
+
+def test_status_polls_leave_the_text_compressed(monkeypatch):
+    inflated = []
+    text = index.CompressedText.text
+    monkeypatch.setattr(index.CompressedText, "text", lambda self: inflated.append(1) or text(self))
+
+    async def scenario():
+        async with client() as http:
+            user_id, headers = await signup(http)
+            result = await index.resumes_collection.insert_one({
+                "user_id": ObjectId(user_id), "filename": "cv.pdf", "status": "ready",
+                "content": "Python engineer with a long history of shipping services. " * 200,
+            })
+            response = await http.get(f"/api/resumes/{result.inserted_id}/status", headers=headers)
+            assert response.status_code == 200, response.text
+            assert response.json()["status"] == "ready"
+
+    asyncio.run(scenario())
+    assert inflated == []
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import pickle
+import shutil
+import threading
+
+import pytest
+
+from api import index
+
+
+def open_storage(path):
+    return index.DurableStorage(str(path), commit_delay_ms=0, snapshot_seconds=0)
+
+
+def crash(storage):
+    """Drop the storage without a snapshot; the lock goes with the process"""
+    storage.journal.close()
+
+
+def contents(storage, name="users"):
+    async def read():
+        docs = await storage.collection(name).find({}).to_list(None)
+        return sorted((str(doc["_id"]), doc["email"], doc.get("name")) for doc in docs)
+    return asyncio.run(read())
+
+
+def write_users(storage):
+    async def write():
+        users = storage.collection("users")
+        for i in range(5):
+            await users.insert_one({"email": f"user{i}@example.com", "name": f"User {i}"})
+        await users.update_one({"email": "user1@example.com"}, {"$set": {"name": "Renamed"}})
+        await users.delete_one({"email": "user2@example.com"})
+        await users.insert_many([{"email": "bulk@example.com"}])
+    asyncio.run(write())
+
+
+def test_lock_is_created_inside_the_running_loop(tmp_path):
+    storage = open_storage(tmp_path)
+    assert storage.journal._lock is None
+    write_users(storage)
+    assert storage.journal._lock is not None
+
+
+def test_recovers_acknowledged_writes_after_a_crash(tmp_path):
+    storage = open_storage(tmp_path)
+    write_users(storage)
+    expected = contents(storage)
+    assert len(expected) == 5 and ("Renamed" in [name for _, _, name in expected])
+
+    # no close(): the process "crashed" with everything only in the log
+    crash(storage)
+    recovered = open_storage(tmp_path)
+    assert contents(recovered) == expected
+    # unique indexes are rebuilt too
+    assert recovered.collection("users")._first({"email": "user3@example.com"}) is not None
+
+
+def test_recovers_snapshot_plus_later_log(tmp_path):
+    storage = open_storage(tmp_path)
+    write_users(storage)
+    asyncio.run(storage.snapshot())
+    assert storage.journal.stats["bytes"] == 0
+
+    async def more():
+        await storage.collection("users").insert_one({"email": "late@example.com"})
+    asyncio.run(more())
+
+    crash(storage)
+    assert contents(open_storage(tmp_path)) == contents(storage)
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    storage = open_storage(tmp_path)
+    write_users(storage)
+    expected = contents(storage)
+    log_path = tmp_path / "journal.log"
+    good_size = os.path.getsize(log_path)
+    crash(storage)
+
+    # a record header promising more bytes than made it to disk
+    with open(log_path, "ab") as f:
+        f.write(index.WriteAheadLog.HEADER.pack(1000, 0) + b"partial")
+
+    recovered = open_storage(tmp_path)
+    assert contents(recovered) == expected
+    assert os.path.getsize(log_path) == good_size
+
+    # the log keeps working after the truncation
+    async def more():
+        await recovered.collection("users").insert_one({"email": "after@example.com"})
+    asyncio.run(more())
+    crash(recovered)
+    assert len(contents(open_storage(tmp_path))) == len(expected) + 1
+
+
+def test_replay_over_a_snapshot_is_idempotent(tmp_path):
+    storage = open_storage(tmp_path)
+    write_users(storage)
+    expected = contents(storage)
+    log_copy = tmp_path / "journal.copy"
+    shutil.copy(tmp_path / "journal.log", log_copy)
+    asyncio.run(storage.snapshot())
+    crash(storage)
+
+    # crash between writing the snapshot and emptying the log: every
+    # record is replayed over a snapshot that already contains it
+    shutil.copy(log_copy, tmp_path / "journal.log")
+    recovered = open_storage(tmp_path)
+    assert contents(recovered) == expected
+    crash(recovered)
+    # and replaying twice changes nothing either
+    assert contents(open_storage(tmp_path)) == expected
+
+
+def test_a_second_worker_cannot_share_the_log(tmp_path):
+    storage = open_storage(tmp_path)
+    with pytest.raises(RuntimeError, match="locked by another process"):
+        open_storage(tmp_path)
+    crash(storage)
+    open_storage(tmp_path)
+
+
+def test_snapshot_pickles_a_copy_off_the_event_loop(tmp_path, monkeypatch):
+    storage = open_storage(tmp_path)
+    write_users(storage)
+    expected = contents(storage)
+    started, release = threading.Event(), threading.Event()
+    write_snapshot = storage._write_snapshot
+
+    def paused_write(data):
+        started.set()
+        release.wait(2)
+        write_snapshot(data)
+    monkeypatch.setattr(storage, "_write_snapshot", paused_write)
+
+    async def scenario():
+        snapshot = asyncio.create_task(storage.snapshot())
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        # the loop keeps serving reads and in-memory writes meanwhile; the
+        # write is logged once the snapshot releases the log
+        insert = asyncio.create_task(storage.collection("users").insert_one({"email": "late@example.com"}))
+        assert await storage.collection("users").find_one({"email": "user0@example.com"})
+        release.set()
+        await snapshot
+        await insert
+
+    asyncio.run(scenario())
+    crash(storage)
+    recovered = open_storage(tmp_path)
+    assert len(contents(recovered)) == len(expected) + 1
+    # the snapshot holds the copy taken under the lock, the late insert is in the log
+    with open(tmp_path / "snapshot.pkl", "rb") as f:
+        assert len(pickle.load(f)["users"]) == len(expected)
+    assert recovered.journal.stats["bytes"] > 0
@@ -0,0 +1,100 @@
+"""Cold-start import budget for api/index.py.
+
+Runs ``python -X importtime -c "import api.index"`` in fresh interpreters,
+fails when the median cumulative import time exceeds IMPORT_BUDGET_MS or
+when a dependency that should load lazily is imported eagerly.  Collected
+by pytest; ``python -m tests.test_import_time`` prints the slowest imports.
+"""
+
+import os
+import subprocess
+import sys
+import json
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "400"))
+RUNS = int(os.getenv("IMPORT_BUDGET_RUNS", "5"))
+
+# Only requests that need these should pay for them
+LAZY_MODULES = [
+    "motor", "openai", "httpx", "PyPDF2", "docx", "bcrypt", "dotenv", "tiktoken", "sentence_transformers", "numpy",
+]
+
+def measure_import():
+    """(cumulative api.index import time in ms, {top-level module: cumulative ms})"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import api.index"],
+        cwd=ROOT, capture_output=True, text=True, env={**os.environ, "STORAGE_DATA_DIR": ""},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    total, top_level = None, {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            cumulative_ms = int(cumulative) / 1000
+        except ValueError:
+            continue  # header line
+        if name.strip() == "api.index":
+            total = cumulative_ms
+        elif name.startswith("   ") and not name.startswith("    "):
+            top_level[name.strip()] = cumulative_ms
+    return total, top_level
+
+def eager_lazy_modules():
+    """LAZY_MODULES that are imported as a side effect of importing the app"""
+    code = (
+        "import sys, json, api.index; "
+        f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "STORAGE_DATA_DIR": ""},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_import_time_within_budget():
+    samples = [measure_import()[0] for _ in range(RUNS)]
+    median = statistics.median(samples)
+    assert median <= IMPORT_BUDGET_MS, f"import time {median:.1f} ms exceeds budget {IMPORT_BUDGET_MS:.0f} ms"
+
+def test_heavy_dependencies_load_lazily():
+    assert eager_lazy_modules() == []
+
+def main():
+    print("⏱️  Measuring api.index import time")
+    print("=" * 60)
+
+    samples, top_level = [], {}
+    for _ in range(RUNS):
+        total, top_level = measure_import()
+        samples.append(total)
+    median = statistics.median(samples)
+
+    print("Slowest top-level imports (last run):")
+    for name, ms in sorted(top_level.items(), key=lambda item: -item[1])[:10]:
+        print(f"    {ms:8.1f} ms  {name}")
+
+    failures = []
+    print(f"\n📊 api.index: median {median:.1f} ms over {RUNS} runs (budget {IMPORT_BUDGET_MS:.0f} ms)")
+    if median > IMPORT_BUDGET_MS:
+        failures.append(f"import time {median:.1f} ms exceeds budget {IMPORT_BUDGET_MS:.0f} ms")
+
+    eager = eager_lazy_modules()
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ FAIL - {failure}")
+        return 1
+    print("✅ PASS - import time within budget, heavy dependencies load lazily")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,318 @@
+import asyncio
+import random
+import threading
+
+import numpy as np
+from bson import ObjectId
+
+from api import index
+from tests.utils import client, mongo_storage, reset_job_indexes, signup
+
+
+def test_page_matches_full_sort_across_cursors():
+    matcher = index.JobMatcher(n_features=1024)
+    matcher.build([{"_id": ObjectId(), "title": f"job {i}"} for i in range(500)])
+    rng = random.Random(7)
+    # few distinct scores, so most of the ordering comes from the id tie-break
+    scores = np.array([rng.choice([0.0, 12.5, 40.0, 97.1]) for _ in matcher.job_ids])
+    candidates = set(rng.sample(matcher.job_ids, 300))
+
+    for subset in (None, candidates):
+        ids = matcher.job_ids if subset is None else subset
+        expected = sorted(((scores[matcher.row_of[i]], i) for i in ids), reverse=True)
+        seen, after = [], None
+        while True:
+            page = matcher.page(scores, subset, after, limit=37)
+            if not page:
+                break
+            seen.extend((score, job_id) for job_id, score in page)
+            after = (page[-1][1], page[-1][0])
+        assert seen == expected
+
+
+def test_jobs_from_other_workers_are_picked_up():
+    async def scenario():
+        async with mongo_storage(interval=0.01):
+            async with client() as http:
+                _, headers = await signup(http, role="employer")
+                mine = (await http.post("/api/jobs", headers=headers, json={"title": "Local job"})).json()
+                assert [job["id"] for job in (await http.get("/api/jobs")).json()] == [mine["id"]]
+                await index.job_matcher.ensure_built()
+                await index.semantic_index.ensure_built()
+
+                # another worker writes straight to the shared store
+                other = {"title": "Remote job", "employer_id": ObjectId()}
+                await index.jobs_collection.insert_one(other)
+                await asyncio.sleep(0.02)
+
+                listed = [job["id"] for job in (await http.get("/api/jobs")).json()]
+                assert listed == [str(other["_id"]), mine["id"]]
+                assert str(other["_id"]) in index.job_matcher.row_of
+                assert str(other["_id"]) in index.semantic_index.job_ids
+                assert index.job_feed.stats["picked_up"] == 1
+
+    asyncio.run(scenario())
+
+
+
+def test_jobs_are_not_added_while_a_worker_thread_scores():
+    release = threading.Event()
+    observed = []
+
+    class PausingMatcher(index.JobMatcher):
+        def scores(self, query):
+            rows = len(self.job_ids)
+            release.wait(2)
+            result = super().scores(query)
+            observed.append((rows, len(self.job_ids), len(result)))
+            return result
+
+    matcher = PausingMatcher(n_features=4096, compact_rows=1)
+    matcher.build([{"_id": ObjectId(), "title": f"python engineer {i}"} for i in range(50)])
+    matcher.dirty = False
+
+    async def scenario():
+        matching = asyncio.create_task(matcher.matches("resume", "python engineer", 5))
+        await asyncio.sleep(0.05)  # the worker thread is now inside scores()
+        adding = asyncio.create_task(matcher.add_jobs([{"_id": ObjectId(), "title": "python developer"}]))
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(matching, adding)
+
+    asyncio.run(scenario())
+    assert observed == [(50, 50, 50)]
+    assert len(matcher.job_ids) == 51
+
+
+def test_single_job_score_matches_the_full_ranking():
+    async def scenario():
+        matcher = index.JobMatcher(n_features=4096, compact_rows=1000)
+        titles = ["python backend engineer", "data scientist python", "chef", "go engineer", ""]
+        matcher.build([{"_id": ObjectId(), "title": title, "description": "remote team"} for title in titles])
+        matcher.dirty = False
+        # rows past the column index are scored from the pending segment
+        await matcher.add_jobs([{"_id": ObjectId(), "title": "senior python engineer"}])
+        assert len(matcher.pending) == 1
+
+        text = "Python engineer with a remote backend team"
+        full = await matcher._percentages("resume", text)
+        for row, job_id in enumerate(matcher.job_ids):
+            assert await matcher.match_score("resume", text, job_id) == full[row]
+        assert await matcher.match_score("resume", text, str(ObjectId())) is None
+
+    asyncio.run(scenario())
+
+
+def test_jobs_added_during_a_search_index_build_are_kept():
+    started, release = threading.Event(), threading.Event()
+
+    class PausingIndex(index.JobSearchIndex):
+        def build(self, jobs):
+            started.set()
+            release.wait(2)
+            return super().build(jobs)
+
+    search_index = PausingIndex()
+    job = {"_id": ObjectId(), "title": "Zyxwvut wrangler"}
+
+    async def scenario():
+        building = asyncio.create_task(search_index.ensure_built())
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        adding = asyncio.create_task(search_index.add_jobs([job]))
+        await asyncio.sleep(0.05)
+        release.set()
+        await asyncio.gather(building, adding)
+
+    asyncio.run(scenario())
+    assert str(job["_id"]) in search_index.ordered_ids
+    assert search_index.search("zyxwvut") == {str(job["_id"])}
+    assert search_index._lock is not None and not search_index.dirty
+
+
+def test_compaction_runs_off_the_event_loop():
+    started, release = threading.Event(), threading.Event()
+
+    class PausingMatcher(index.JobMatcher):
+        def _compacted(self, pending):
+            started.set()
+            release.wait(2)
+            return super()._compacted(pending)
+
+    matcher = PausingMatcher(n_features=4096, compact_rows=2)
+    matcher.build([{"_id": ObjectId(), "title": f"python engineer {i}"} for i in range(20)])
+    matcher.dirty = False
+
+    async def scenario():
+        adding = asyncio.create_task(matcher.add_jobs(
+            [{"_id": ObjectId(), "title": "python developer"}, {"_id": ObjectId(), "title": "go developer"}]
+        ))
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+        # the loop is free while the thread compacts, and reads see the current arrays
+        assert matcher.n_indexed == 20 and len(matcher.pending) == 2
+        during = await matcher._percentages("resume", "python developer")
+        release.set()
+        await adding
+        after = await matcher._percentages("resume", "python developer")
+        return during, after
+
+    during, after = asyncio.run(scenario())
+    assert len(during) == len(after) == 22
+    assert matcher.n_indexed == 22 and matcher.pending == []
+    assert matcher.stats["compactions"] == 1
+
+
+def unit_vectors(n, dim=32, seed=0):
+    vectors = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_ivf_search_matches_exhaustive_search_across_training():
+    vectors = unit_vectors(1300)
+    ids = [str(i) for i in range(len(vectors))]
+    ivf = index.IVFIndex(32, nprobe=1000, train_min=256)
+
+    def exact(query, size, k=5):
+        scores = vectors[:size] @ query
+        return [ids[i] for i in np.argsort(-scores)[:k]]
+
+    ivf.add(ids[:200], vectors[:200])
+    assert ivf.centroids is None
+    assert [job_id for _, job_id in ivf.search(vectors[7], 5)] == exact(vectors[7], 200)
+
+    ivf.add(ids[200:300], vectors[200:300])
+    assert ivf.trained_size == 300 and len(ivf.centroids) == 17
+    # probing every list is exact
+    assert [job_id for _, job_id in ivf.search(vectors[250], 5)] == exact(vectors[250], 300)
+
+    # vectors added after training join a list and are found
+    ivf.add(ids[300:310], vectors[300:310])
+    assert ivf.trained_size == 300 and sum(map(len, ivf.lists)) == 310
+    assert ivf.search(vectors[305], 1)[0][1] == "305"
+
+    # retrained once the index has grown 4x
+    ivf.add(ids[310:1199], vectors[310:1199])
+    assert ivf.trained_size == 300
+    ivf.add(ids[1199:], vectors[1199:])
+    assert ivf.trained_size == 1300 and len(ivf.centroids) == 36
+    assert [job_id for _, job_id in ivf.search(vectors[1250], 5)] == exact(vectors[1250], 1300)
+
+
+def test_semantic_search_waits_for_jobs_being_added():
+    release = threading.Event()
+    semantic = index.SemanticIndex()
+    semantic._add_jobs([{"_id": ObjectId(), "title": f"python engineer {i}"} for i in range(20)])
+    semantic.dirty = False
+    add_jobs, add_resume = semantic._add_jobs, semantic.add_resume
+
+    def paused_add(jobs):
+        release.wait(2)
+        add_jobs(jobs)
+    semantic._add_jobs = paused_add
+
+    async def scenario():
+        embedding = asyncio.Event()
+
+        async def slow_add_resume(resume_id, text):
+            await embedding.wait()
+            return await add_resume(resume_id, text)
+        semantic.add_resume = slow_add_resume
+
+        # past ensure_built(), embedding the resume when a job batch starts
+        matching = asyncio.create_task(semantic.matches("resume", "python developer", 50))
+        await asyncio.sleep(0.01)
+        adding = asyncio.create_task(semantic.add_jobs([{"_id": ObjectId(), "title": "python developer"}]))
+        await asyncio.sleep(0.05)  # the worker thread is now inside _add_jobs()
+        embedding.set()
+        await asyncio.sleep(0.05)
+        assert not matching.done()
+        release.set()
+        await adding
+        return await matching
+
+    assert len(asyncio.run(scenario())) == 21
+
+
+def test_resume_matches_endpoint():
+    async def scenario():
+        async with client() as http:
+            _, employer = await signup(http, role="employer")
+            job = {"title": "Sommelier", "company": "Cellar", "description": "wine tasting cellar pairing"}
+            job = (await http.post("/api/jobs", headers=employer, json=job)).json()
+            owner_id, owner = await signup(http)
+            _, stranger = await signup(http)
+            resume = {
+                "user_id": ObjectId(owner_id), "filename": "cv.docx", "status": "ready",
+                "content": "Sommelier: wine tasting, cellar management and food pairing",
+            }
+            await index.resumes_collection.insert_one(resume)
+            reset_job_indexes()
+
+            url = f"/api/resumes/{resume['_id']}/matches"
+            assert (await http.get(url)).status_code == 401
+            assert (await http.get(url, headers=stranger)).status_code == 404
+            response = await http.get(url, headers=owner, params={"k": 3})
+            assert response.status_code == 200, response.text
+            matches = response.json()
+            assert 1 <= len(matches) <= 3
+            assert matches[0]["id"] == job["id"] and 0 < matches[0]["match_score"] <= 100
+
+    asyncio.run(scenario())
+
+
+def interrupted_jobs_collection(monkeypatch):
+    """A job store whose first read is cancelled; returns the list of reads"""
+    calls = []
+
+    async def find_jobs():
+        calls.append(1)
+        if len(calls) == 1:
+            raise asyncio.CancelledError
+        return [{"_id": ObjectId(), "title": "python engineer"}]
+
+    class Jobs:
+        def find(self, query):
+            return type("Cursor", (), {"to_list": lambda self, length: find_jobs()})()
+    monkeypatch.setattr(index, "jobs_collection", Jobs())
+    return calls
+
+
+def matches_after_an_interrupted_build(job_index, *args):
+    async def scenario():
+        try:
+            await job_index.matches(*args)
+        except asyncio.CancelledError:
+            pass
+        assert job_index.dirty
+        return await job_index.matches(*args)
+    return asyncio.run(scenario())
+
+
+def test_an_interrupted_build_is_retried(monkeypatch):
+    calls = interrupted_jobs_collection(monkeypatch)
+    matches = matches_after_an_interrupted_build(index.JobMatcher(n_features=4096), "resume", "python engineer")
+    assert [score for _, score in matches] == [100.0]
+    assert len(calls) == 2
+
+
+def test_an_interrupted_semantic_build_is_retried(monkeypatch):
+    calls = interrupted_jobs_collection(monkeypatch)
+    matches = matches_after_an_interrupted_build(index.SemanticIndex(), "resume", "python engineer", 5)
+    assert len(matches) == 1 and matches[0][1] > 50
+    assert len(calls) == 2
+
+
+def test_filtered_pages_match_a_full_sort():
+    ordered = sorted(str(ObjectId()) + str(i) for i in range(500))
+    ids = set(random.Random(0).sample(ordered, 120))
+    expected = sorted(ids, reverse=True)
+    pages, after = [], None
+    while True:
+        page = index.page_newest_first(ordered, ids, after, 25)
+        pages.extend(page[:25])
+        if len(page) <= 25:
+            break
+        after = page[24]
+    assert pages == expected
+    assert index.page_newest_first(ordered, None, None, 3) == ordered[::-1][:4]
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import httpx
+import openai
+import pytest
+from fastapi import HTTPException
+
+from api import index
+
+MESSAGES = [{"role": "user", "content": "Summarise this resume"}]
+
+
+def completion(content):
+    return {
+        "id": "test", "object": "chat.completion", "created": 0, "model": "gpt-4",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}],
+    }
+
+
+def stream_body(*deltas):
+    events = [
+        {"id": "test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-4",
+         "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+        for delta in deltas
+    ]
+    return "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+
+
+def rate_limited():
+    return httpx.Response(429, headers={"retry-after": "0"}, json={"error": {"message": "slow down"}})
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    """Route the shared client through a MockTransport answering with ``responses`` in order"""
+    requests = []
+
+    def install(*responses):
+        def handler(request):
+            requests.append(request)
+            return responses[min(len(requests), len(responses)) - 1]()
+
+        client = openai.AsyncOpenAI(
+            api_key="test", base_url="http://fake-openai/v1", max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        monkeypatch.setattr(index, "_openai_client", client)
+        monkeypatch.setattr(index, "_llm_semaphore", None)
+        return requests
+
+    return install
+
+
+def test_rate_limit_is_retried_then_succeeds(fake_openai):
+    requests = fake_openai(rate_limited, lambda: httpx.Response(200, json=completion("A strong resume")))
+    assert asyncio.run(index.chat_completion(MESSAGES)) == "A strong resume"
+    assert len(requests) == 2
+
+
+def test_exhausted_retries_become_503(fake_openai):
+    requests = fake_openai(rate_limited)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(index.chat_completion(MESSAGES))
+    assert error.value.status_code == 503
+    assert len(requests) == index.OPENAI_MAX_RETRIES + 1
+
+
+def test_client_errors_are_not_retried(fake_openai):
+    requests = fake_openai(lambda: httpx.Response(400, json={"error": {"message": "bad request"}}))
+    with pytest.raises(openai.BadRequestError):
+        asyncio.run(index.chat_completion(MESSAGES))
+    assert len(requests) == 1
+
+
+def test_stream_open_is_retried(fake_openai):
+    requests = fake_openai(rate_limited, lambda: httpx.Response(
+        200, text=stream_body("A strong ", "resume"), headers={"content-type": "text/event-stream"},
+    ))
+
+    async def collect():
+        return [delta async for delta in index.stream_chat_completion(MESSAGES)]
+
+    assert asyncio.run(collect()) == ["A strong ", "resume"]
+    assert len(requests) == 2
+
+
+def test_stream_exhausted_retries_become_503(fake_openai):
+    requests = fake_openai(rate_limited)
+
+    async def collect():
+        return [delta async for delta in index.stream_chat_completion(MESSAGES)]
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(collect())
+    assert error.value.status_code == 503
+    assert len(requests) == index.OPENAI_MAX_RETRIES + 1
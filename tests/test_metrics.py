@@ -0,0 +1,43 @@
+import asyncio
+
+from api import index
+from tests.utils import client
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = index.Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    for seconds in (0.05, 0.1, 0.5, 5):
+        histogram.observe(("/a",), seconds)
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 5.650000',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_metrics_are_labelled_by_route_template():
+    def count(text, prefix):
+        lines = [line for line in text.splitlines() if line.startswith(prefix)]
+        return int(lines[0].rsplit(" ", 1)[1]) if lines else 0
+
+    series = 'http_request_duration_seconds_count{method="GET",route="/api/jobs/{job_id}",status="404"}'
+
+    async def scenario():
+        async with client() as http:
+            before = count((await http.get("/metrics")).text, series)
+            for job_id in ("000000000000000000000001", "000000000000000000000002"):
+                assert (await http.get(f"/api/jobs/{job_id}")).status_code == 404
+            response = await http.get("/metrics")
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain")
+            return before, response.text
+
+    before, text = asyncio.run(scenario())
+    assert count(text, series) == before + 2
+    assert "000000000000000000000001" not in text
+    assert "# TYPE app_password_pool gauge" in text
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from api import index
+
+
+def fake_parse(file_path):
+    """Stands in for parse_resume_file inside the pool's worker processes"""
+    if "crash" in file_path:
+        os._exit(1)
+    if "hang" in file_path:
+        time.sleep(60)
+    if "slow" in file_path:
+        time.sleep(0.8)
+    return f"parsed {file_path}"
+
+
+@pytest.fixture
+def parse_pool(monkeypatch):
+    monkeypatch.setattr(index, "parse_resume_file", fake_parse)
+    monkeypatch.setattr(index, "PARSE_WORKERS", 2)
+    monkeypatch.setattr(index, "PARSE_TIMEOUT_SECONDS", 1.0)
+    monkeypatch.setattr(index, "_parse_executor", None)
+    yield
+    if index._parse_executor is not None:
+        index.recycle_parse_executor(index._parse_executor)
+
+
+def test_timeout_recycles_the_pool(parse_pool):
+    async def scenario():
+        assert await index.parse_resume("warm.docx") == "parsed warm.docx"
+        pool = index._parse_executor
+        workers = list(pool._processes.values())
+
+        with pytest.raises(HTTPException) as error:
+            await index.parse_resume("hang.docx")
+        assert error.value.status_code == 422
+
+        assert index._parse_executor is None
+        for process in workers:
+            process.join(5)
+            assert not process.is_alive()
+
+        assert await index.parse_resume("after.docx") == "parsed after.docx"
+        assert index._parse_executor is not pool
+
+    asyncio.run(scenario())
+
+
+def test_parses_sharing_a_recycled_pool_are_retried(parse_pool):
+    async def slow_after_a_moment():
+        await asyncio.sleep(0.6)
+        return await index.parse_resume("slow.docx")
+
+    async def scenario():
+        return await asyncio.gather(
+            index.parse_resume("hang.docx"), slow_after_a_moment(), return_exceptions=True
+        )
+
+    hung, slow = asyncio.run(scenario())
+    assert isinstance(hung, HTTPException) and hung.status_code == 422
+    assert slow == "parsed slow.docx"
+
+
+def test_a_crashed_worker_does_not_break_later_parses(parse_pool):
+    async def scenario():
+        assert await index.parse_resume("warm.docx") == "parsed warm.docx"
+        pool = index._parse_executor
+
+        with pytest.raises(HTTPException) as error:
+            await index.parse_resume("crash.docx")
+        assert error.value.status_code == 422
+        assert index._parse_executor is not pool
+
+        assert await index.parse_resume("after.docx") == "parsed after.docx"
+
+    asyncio.run(scenario())
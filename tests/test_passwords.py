@@ -0,0 +1,77 @@
+import asyncio
+import time
+import uuid
+
+from api import index
+from tests.utils import client
+
+
+def test_running_count_is_kept_on_the_loop():
+    def slow_job(seconds):
+        time.sleep(seconds)
+        return seconds
+
+    async def scenario():
+        samples = []
+
+        async def sample():
+            while True:
+                samples.append(index.password_stats["running"])
+                await asyncio.sleep(0.005)
+
+        sampler = asyncio.create_task(sample())
+        results = await asyncio.gather(*[index.run_password_job(slow_job, 0.02) for _ in range(12)])
+        await asyncio.sleep(0.01)  # let the last decrements land
+        sampler.cancel()
+        return results, samples
+
+    results, samples = asyncio.run(scenario())
+    assert results == [0.02] * 12
+    assert max(samples) > 0
+    assert max(samples) <= index.PASSWORD_WORKERS
+    assert index.password_stats["running"] == 0
+    assert index.password_stats["pending"] == 0
+
+
+def test_hash_and_verify_round_trip():
+    async def scenario():
+        hashed = await index.hash_password("correct horse")
+        assert await index.verify_password("correct horse", hashed)
+        assert not await index.verify_password("wrong", hashed)
+
+    asyncio.run(scenario())
+
+
+def test_low_cost_hashes_are_upgraded_on_login(monkeypatch):
+    import bcrypt
+
+    async def scenario():
+        async with client() as http:
+            email = f"{uuid.uuid4().hex}@example.com"
+            response = await http.post("/api/auth/signup", json={"email": email, "password": "pw", "role": "job_seeker"})
+            assert response.status_code == 200, response.text
+            user = await index.users_collection.find_one({"email": email})
+            assert not index.password_needs_rehash(user["password"])
+
+            monkeypatch.setattr(index, "BCRYPT_ROUNDS", index.BCRYPT_ROUNDS + 1)
+            assert index.password_needs_rehash(user["password"])
+            rehashes = index.password_stats["rehashes"]
+            response = await http.post("/api/auth/login", json={"email": email, "password": "pw"})
+            assert response.status_code == 200, response.text
+            # the upgrade runs after the response
+            await asyncio.gather(*index._background_tasks)
+
+            upgraded = (await index.users_collection.find_one({"email": email}))["password"]
+            assert upgraded != user["password"] and not index.password_needs_rehash(upgraded)
+            assert bcrypt.checkpw(b"pw", upgraded.encode())
+            # the upgraded hash still logs in, and isn't rehashed again
+            response = await http.post("/api/auth/login", json={"email": email, "password": "pw"})
+            assert response.status_code == 200, response.text
+            assert index.password_stats["rehashes"] == rehashes + 1
+
+    asyncio.run(scenario())
+
+
+def test_unrecognised_hashes_are_not_rehashed():
+    assert not index.password_needs_rehash("not-a-bcrypt-hash")
+    assert not index.password_needs_rehash("$2b$xx$abc")
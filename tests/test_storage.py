@@ -0,0 +1,195 @@
+import asyncio
+import contextlib
+import uuid
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from api import index
+from tests.utils import client, mongo_storage, signup
+
+BACKENDS = ["memory", "durable", "mongo"]
+
+
+@contextlib.asynccontextmanager
+async def open_backend(backend, tmp_path):
+    if backend == "memory":
+        storage = index.InMemoryStorage()
+    elif backend == "durable":
+        storage = index.DurableStorage(str(tmp_path), commit_delay_ms=0, snapshot_seconds=0)
+    else:
+        from mongomock_motor import AsyncMongoMockClient
+        storage = index.MongoStorage(
+            "mongodb://test", f"test_{uuid.uuid4().hex}", client_factory=AsyncMongoMockClient
+        )
+    await storage.connect()
+    try:
+        yield storage
+    finally:
+        await storage.close()
+
+
+def run(backend, tmp_path, scenario):
+    async def main():
+        async with open_backend(backend, tmp_path) as storage:
+            await scenario(storage)
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_crud_and_projection(backend, tmp_path):
+    async def scenario(storage):
+        users = storage.collection("users")
+        result = await users.insert_one({"email": "a@example.com", "name": "A", "password": "secret"})
+        assert isinstance(result.inserted_id, ObjectId)
+
+        user = await users.find_one({"_id": result.inserted_id}, {"password": 0})
+        assert user["email"] == "a@example.com" and "password" not in user
+
+        await users.update_one({"email": "a@example.com"}, {"$set": {"name": "B"}})
+        assert (await users.find_one({"email": "a@example.com"}))["name"] == "B"
+
+        await users.delete_one({"_id": result.inserted_id})
+        assert await users.find_one({"email": "a@example.com"}) is None
+
+    run(backend, tmp_path, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_unique_indexes_are_maintained(backend, tmp_path):
+    async def scenario(storage):
+        users = storage.collection("users")
+        await users.insert_one({"email": "a@example.com"})
+        with pytest.raises(DuplicateKeyError):
+            await users.insert_one({"email": "a@example.com"})
+
+        # the index follows updates: the old value is free, the new one taken
+        await users.update_one({"email": "a@example.com"}, {"$set": {"email": "b@example.com"}})
+        await users.insert_one({"email": "a@example.com"})
+        with pytest.raises(DuplicateKeyError):
+            await users.insert_one({"email": "b@example.com"})
+
+        # and deletes
+        await users.delete_one({"email": "b@example.com"})
+        await users.insert_one({"email": "b@example.com"})
+
+    run(backend, tmp_path, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_insert_many_reports_failed_positions(backend, tmp_path):
+    async def scenario(storage):
+        users = storage.collection("users")
+        await users.insert_one({"email": "taken@example.com"})
+        docs = [{"email": "x@example.com"}, {"email": "taken@example.com"}, {"email": "y@example.com"}]
+        failed = await index.insert_many_reporting(users, docs)
+        assert list(failed) == [1]
+        emails = sorted(doc["email"] for doc in await users.find({}).to_list(None))
+        assert emails == ["taken@example.com", "x@example.com", "y@example.com"]
+
+        with pytest.raises(BulkWriteError):
+            await users.insert_many([{"email": "z@example.com"}, {"email": "z@example.com"}])
+
+    run(backend, tmp_path, scenario)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_cursor_sort_skip_limit(backend, tmp_path):
+    async def scenario(storage):
+        jobs = storage.collection("jobs")
+        employer = ObjectId()
+        await jobs.insert_many([
+            {"title": f"job {i}", "rank": i % 5, "employer_id": employer if i % 2 else ObjectId()}
+            for i in range(20)
+        ])
+
+        docs = await jobs.find({"employer_id": employer}, {"title": 1, "rank": 1}).sort(
+            [("rank", -1), ("title", 1)]
+        ).skip(2).limit(3).to_list(None)
+        mine = sorted(
+            ((i % 5, f"job {i}") for i in range(20) if i % 2), key=lambda item: (-item[0], item[1])
+        )
+        assert [(d["rank"], d["title"]) for d in docs] == mine[2:5]
+        assert all("employer_id" not in d for d in docs)
+
+        streamed = [doc["title"] async for doc in jobs.find({}).sort("rank", 1).limit(4)]
+        assert len(streamed) == 4
+
+    run(backend, tmp_path, scenario)
+
+
+def test_resume_text_is_stored_compressed_in_memory():
+    async def scenario():
+        resumes = index.InMemoryStorage().collection("resumes")
+        content = "Senior Python engineer. " * 400
+        result = await resumes.insert_one({"user_id": ObjectId(), "content": content})
+        stored = resumes.data[str(result.inserted_id)]
+        assert isinstance(stored.to_dict(raw=True)["content"], index.CompressedText)
+        assert (await resumes.find_one({"_id": result.inserted_id}))["content"] == content
+        stats = resumes.memory_stats()
+        assert stats["documents"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_mongo_indexes_are_created_on_connect():
+    async def scenario():
+        async with mongo_storage() as storage:
+            info = await storage.db["users"].index_information()
+            assert any(spec["key"] == [("email", 1)] and spec.get("unique") for spec in info.values())
+            async with client() as http:
+                email = f"{uuid.uuid4().hex}@example.com"
+                body = {"email": email, "password": "pw"}
+                assert (await http.post("/api/auth/signup", json=body)).status_code == 200
+                assert (await http.post("/api/auth/signup", json=body)).status_code == 400
+
+    asyncio.run(scenario())
+
+
+def test_job_pages_follow_the_cursor_on_mongo():
+    async def scenario():
+        async with mongo_storage():
+            async with client() as http:
+                _, headers = await signup(http, role="employer")
+                created = []
+                for i in range(7):
+                    title = f"{'Python' if i % 2 else 'Go'} engineer {i}"
+                    created.append((await http.post("/api/jobs", headers=headers, json={"title": title})).json()["id"])
+
+                for query, expected in ((None, created[::-1]), ("python", created[1::2][::-1])):
+                    seen, cursor = [], None
+                    while True:
+                        params = {"limit": 2, **({"q": query} if query else {}), **({"cursor": cursor} if cursor else {})}
+                        response = await http.get("/api/jobs", params=params)
+                        assert response.status_code == 200, response.text
+                        seen.extend(job["id"] for job in response.json())
+                        cursor = response.headers.get("x-next-cursor")
+                        if not cursor:
+                            break
+                    assert seen == expected
+
+                assert (await http.get("/api/jobs", params={"cursor": "!!"})).status_code == 400
+
+    asyncio.run(scenario())
+
+
+def test_auth_caches_tokens_and_users_on_mongo():
+    async def scenario():
+        async with mongo_storage():
+            async with client() as http:
+                user_id, headers = await signup(http)
+                before = dict(index.auth_stats)
+                for _ in range(3):
+                    response = await http.get("/api/auth/me", headers=headers)
+                    assert response.status_code == 200 and response.json()["id"] == user_id
+                stats = {key: index.auth_stats[key] - before[key] for key in before}
+                assert stats["token_misses"] <= 1 and stats["token_hits"] >= 2
+                assert stats["user_misses"] <= 1 and stats["user_hits"] >= 2
+                assert "password" not in index._user_cache[user_id][0]
+
+                bad = {"Authorization": headers["Authorization"] + "x"}
+                assert (await http.get("/api/auth/me", headers=bad)).status_code == 401
+                assert (await http.get("/api/auth/me")).status_code == 401
+
+    asyncio.run(scenario())
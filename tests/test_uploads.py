@@ -0,0 +1,87 @@
+import asyncio
+import hashlib
+import io
+import os
+import uuid
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, UploadFile
+
+from api import index
+from tests.utils import client, signup
+
+
+def upload(data, filename="CV.DOCX", size=None):
+    return UploadFile(io.BytesIO(data), filename=filename, size=size)
+
+
+def test_uploads_are_stored_under_their_content_hash(monkeypatch, tmp_path):
+    monkeypatch.setattr(index, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(index, "UPLOAD_CHUNK_SIZE", 16)
+    data = b"resume bytes " * 10
+
+    async def scenario():
+        first = await index.save_upload(upload(data))
+        second = await index.save_upload(upload(data, filename="renamed.docx"))
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    digest = hashlib.sha256(data).hexdigest()
+    assert first == second == (str(tmp_path / f"{digest}.docx"), digest, len(data))
+    assert os.listdir(tmp_path) == [f"{digest}.docx"]
+
+
+def test_oversized_uploads_are_rejected_while_streaming(monkeypatch, tmp_path):
+    monkeypatch.setattr(index, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(index, "UPLOAD_CHUNK_SIZE", 16)
+    monkeypatch.setattr(index, "MAX_UPLOAD_BYTES", 100)
+
+    async def save(file):
+        with pytest.raises(HTTPException) as error:
+            await index.save_upload(file)
+        return error.value
+
+    # a declared size over the cap is rejected before reading anything
+    declared = upload(b"x" * 10, size=101)
+    assert asyncio.run(save(declared)).status_code == 413
+    assert declared.file.tell() == 0
+    # without one, reading stops once the cap is crossed
+    streamed = upload(b"x" * 1000)
+    assert asyncio.run(save(streamed)).status_code == 413
+    assert streamed.file.tell() <= 100 + 16
+    assert asyncio.run(save(upload(b""))).status_code == 400
+    # partial files are removed
+    assert os.listdir(tmp_path) == []
+
+
+def test_identical_uploads_are_parsed_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(index, "UPLOAD_DIR", str(tmp_path))
+    parsed = []
+
+    async def parse(file_path):
+        parsed.append(file_path)
+        return "Jane Doe\nPython engineer"
+    monkeypatch.setattr(index, "parse_resume", parse)
+    data = f"resume {uuid.uuid4()}".encode()
+
+    async def scenario():
+        async with client() as http:
+            _, headers = await signup(http)
+            before = (await http.get("/api/resumes/dedup/stats")).json()
+            ids = []
+            for name in ("cv.docx", "copy.docx"):
+                response = await http.post("/api/resumes/upload", headers=headers, files={"file": (name, data)})
+                assert response.status_code == 200, response.text
+                assert response.json()["status"] == "ready"
+                ids.append(response.json()["resume_id"])
+            after = (await http.get("/api/resumes/dedup/stats")).json()
+            resumes = [await index.resumes_collection.find_one({"_id": ObjectId(i)}) for i in ids]
+            return before, after, resumes
+
+    before, after, resumes = asyncio.run(scenario())
+    assert len(parsed) == 1
+    assert after["parse_misses"] - before["parse_misses"] == 1
+    assert after["parse_hits"] - before["parse_hits"] == 1
+    assert resumes[0]["content_hash"] == resumes[1]["content_hash"]
+    assert resumes[1]["content"] == "Jane Doe\nPython engineer"
@@ -0,0 +1,51 @@
+import contextlib
+import uuid
+
+import httpx
+
+from api import index
+
+
+def client():
+    """httpx client bound to the app in-process (no lifespan events)"""
+    transport = httpx.ASGITransport(app=index.app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def signup(http, role="job_seeker"):
+    """Register a fresh user; returns (user id, auth headers)"""
+    response = await http.post(
+        "/api/auth/signup",
+        json={"email": f"{uuid.uuid4().hex}@example.com", "password": "pw", "role": role},
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    return body["user"]["id"], {"Authorization": f"Bearer {body['token']}"}
+
+
+def reset_job_indexes(**feed_options):
+    """Make every job index rebuild from the current store on next use"""
+    index.job_matcher.mark_dirty()
+    index.semantic_index.dirty = True
+    index.job_search_index.dirty = True
+    index.job_feed = index.JobFeed(**feed_options)
+
+
+@contextlib.asynccontextmanager
+async def mongo_storage(**feed_options):
+    """Run the app against a fresh mongomock database, then restore the in-memory store"""
+    from mongomock_motor import AsyncMongoMockClient
+
+    previous = index.storage
+    index.storage = index.MongoStorage(
+        "mongodb://test", f"test_{uuid.uuid4().hex}", client_factory=AsyncMongoMockClient
+    )
+    await index.startup_storage()
+    reset_job_indexes(**feed_options)
+    try:
+        yield index.storage
+    finally:
+        await index.shutdown_storage()
+        index.storage = previous
+        index.bind_collections()
+        reset_job_indexes()